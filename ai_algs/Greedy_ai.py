@@ -1,6 +1,8 @@
-import copy
 import math
 
+from ai_algs.feature_state import rules_for
+from bitboard import exponent_to_tile
+
 class GreedyAgent:
     """
     A Greedy agent for 2048 that picks the move which maximizes an immediate-state heuristic.
@@ -14,10 +16,11 @@ class GreedyAgent:
         best_value = -math.inf
         best_features = None
 
-        for move in game.get_valid_moves():
+        rules = rules_for(getattr(game, 'size', 4))
+        state = rules.track(game.get_state())
+        for move in rules.valid_moves(state):
             # Simulate the move
-            succ = copy.deepcopy(game)
-            succ.move_board(move)
+            succ = rules.apply_move(state, move)
             # Compute features on the resulting state
             feat = self._compute_features(succ)
             # Evaluate with the same heuristic as ExpectimaxAgent
@@ -35,38 +38,42 @@ class GreedyAgent:
         merge = best_features['merge']
         return best_move, pos, empty, mono, merge
 
-    def _compute_features(self, game):
-        board = game.board
-        size = game.size
-        # Feature: max tile
-        max_tile = game.get_max_tile()
-        # Feature: empty cell count
-        empties = len(game.get_empty_cells())
-        # Feature: merge potential
-        merge_pot = 0
-        for i in range(size):
-            for j in range(size):
-                if j+1 < size and board[i][j] == board[i][j+1] and board[i][j] != 0:
-                    merge_pot += 1
-                if i+1 < size and board[i][j] == board[i+1][j] and board[i][j] != 0:
-                    merge_pot += 1
-        # Feature: monotonicity
-        mono = 0
-        # Rows
-        for row in board:
-            for i in range(size-1):
-                if row[i] >= row[i+1]:
-                    mono += (row[i] - row[i+1])
-        # Columns
-        for j in range(size):
-            for i in range(size-1):
-                if board[i][j] >= board[i+1][j]:
-                    mono += (board[i][j] - board[i+1][j])
+    def get_batch_actions(self, candidates, valid):
+        """
+        Vectorized get_action for batch_engine.BatchGames: scores every
+        candidate board with the same heuristic and picks the best valid move.
+        """
+        import numpy as np
+        from batch_engine import cell_values
+
+        values = cell_values(candidates.reshape(-1)).astype(np.float64)
+        max_tile = values.max(axis=(1, 2))
+        empties = (values == 0).sum(axis=(1, 2))
+        merge_pot = (
+            ((values[:, :, :-1] == values[:, :, 1:]) & (values[:, :, :-1] != 0)).sum(axis=(1, 2))
+            + ((values[:, :-1, :] == values[:, 1:, :]) & (values[:, :-1, :] != 0)).sum(axis=(1, 2))
+        )
+        mono = (
+            np.clip(values[:, :, :-1] - values[:, :, 1:], 0, None).sum(axis=(1, 2))
+            + np.clip(values[:, :-1, :] - values[:, 1:, :], 0, None).sum(axis=(1, 2))
+        )
+        pos_score = np.log2(np.maximum(max_tile, 1))
+        scores = (
+            1.0 * pos_score +
+            3.0 * empties +
+            1.2 * merge_pot +
+            1.5 * mono
+        ).reshape(valid.shape)
+        scores[~valid] = -np.inf
+        return scores.argmax(axis=1)
+
+    def _compute_features(self, state):
+        # Totals maintained incrementally by the FeatureState
         return {
-            'position': max_tile,
-            'empty': empties,
-            'merge': merge_pot,
-            'monotonicity': mono
+            'position': exponent_to_tile(state.max_exp),
+            'empty': state.empty,
+            'merge': state.merge,
+            'monotonicity': state.mono
         }
 
     def _heuristic(self, features):
@@ -0,0 +1,92 @@
+import random
+import time
+
+from bitboard import MOVES, exponent_to_tile
+from ai_algs.feature_state import track, apply_move
+
+class MonteCarloAgent:
+    """
+    A Monte Carlo agent for 2048: plays many playouts from each valid move and
+    picks the move with the best average final score. All playouts of all moves
+    run as one batch on the NumPy batch engine (batch_engine.py), so a move
+    costs one vectorized step per playout ply rather than one Python game per playout.
+
+    playouts   playouts per valid move in each batch
+    policy     "random" or "greedy" (best immediate merge gain, random tie-break)
+    max_moves  stop playouts after this many moves (None plays them out)
+    time_limit_ms  run batches until the budget runs out; playouts still running
+               then are cut off and scored where they stand
+    Returns: (move, position_score, empty_cells, monotonicity_score, merge_potential)
+    """
+    def __init__(self, playouts=100, policy="random", max_moves=None, time_limit_ms=None):
+        if policy not in ("random", "greedy"):
+            raise ValueError(f"unknown policy: {policy!r}")
+        self.playouts = playouts
+        self.policy = policy
+        self.max_moves = max_moves
+        self.time_limit_ms = time_limit_ms
+        if time_limit_ms is not None:
+            # Builds the batch engine's move tables now rather than inside the first move's budget
+            import batch_engine
+        # Playouts and playout moves simulated since the agent was created
+        self.playouts_run = 0
+        self.playout_moves = 0
+
+    def get_action(self, game):
+        import numpy as np
+
+        if getattr(game, 'size', 4) != 4:
+            raise ValueError("batched playouts only run on 4x4 boards")
+        # Drawn from the global RNG on every call, so a seeded game plays the same
+        # whatever the agent played before it
+        rng = np.random.default_rng(random.getrandbits(64))
+        state = track(game.get_state())
+        children = {move: apply_move(state, move) for move in MOVES}
+        moves = [move for move in MOVES if children[move].board != state.board]
+        if not moves:
+            return "Up", 0, 0, 0, 0
+
+        # Every move gets the same number of playouts, cut off after the same number of
+        # steps, so the best total is the best average
+        totals = np.zeros(len(moves))
+        deadline = None if self.time_limit_ms is None else time.perf_counter() + self.time_limit_ms / 1000
+        while True:
+            totals += self._playout_batch(moves, children, state.score, rng, deadline)
+            if deadline is None or time.perf_counter() >= deadline:
+                break
+        best_move = moves[int(totals.argmax())]
+
+        # Features of the chosen afterstate, for GUI plotting
+        after = children[best_move]
+        return best_move, exponent_to_tile(after.max_exp), after.empty, after.mono, after.merge
+
+    def _playout_batch(self, moves, children, score, rng, deadline=None):
+        """
+        Runs self.playouts playouts per move; returns each move's summed final score.
+        Playouts still running at the deadline are scored where they stand.
+        """
+        import numpy as np
+        from batch_engine import BatchGames, spawn_tiles
+
+        n = self.playouts
+        afters = np.repeat(np.array([children[move].board for move in moves], dtype=np.uint64), n)
+        games = BatchGames.from_boards(spawn_tiles(afters, rng), rng)
+        step = 0
+        while not games.done and (self.max_moves is None or step < self.max_moves) \
+                and (deadline is None or time.perf_counter() < deadline):
+            games.step(self._choose(games, rng))
+            step += 1
+        self.playouts_run += len(afters)
+        self.playout_moves += int(games.moves.sum())
+        gains = np.array([children[move].score - score for move in moves], dtype=np.float64)
+        return games.scores.reshape(len(moves), n).sum(axis=1) + n * gains
+
+    def _choose(self, games, rng):
+        """One move index per live playout under the playout policy."""
+        import numpy as np
+
+        keys = rng.random(games.valid.shape)
+        if self.policy == "greedy":
+            keys = keys + games.gains
+        keys[~games.valid] = -np.inf
+        return keys.argmax(axis=1)
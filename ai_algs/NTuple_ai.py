@@ -0,0 +1,32 @@
+import os
+
+from ai_algs.feature_state import track, apply_move
+from ai_algs.ntuple import NTupleNetwork
+
+# Written by train_ntuple.py
+DEFAULT_WEIGHTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ntuple_weights.bin")
+
+class NTupleAgent:
+    """
+    A 2048 agent driven by a trained n-tuple network (see ai_algs/ntuple.py):
+    plays the move with the best reward plus network value of the afterstate,
+    with no further search. Weights are memory-mapped from weights_path.
+    For deeper search, pass the network to an Expectimax agent as its evaluator.
+    Returns: (move, value, empty_cells, monotonicity_score, merge_potential)
+    """
+    def __init__(self, weights_path=DEFAULT_WEIGHTS):
+        if not os.path.exists(weights_path):
+            raise FileNotFoundError(f"no n-tuple weights at {weights_path}; train them with train_ntuple.py")
+        self.network = NTupleNetwork.load(weights_path)
+
+    def get_action(self, game):
+        if getattr(game, 'size', 4) != 4:
+            raise ValueError("the n-tuple network only plays 4x4 boards")
+        state = game.get_state()
+        best = self.network.best_move(state.board)
+        if best is None:
+            return "Up", 0, 0, 0, 0
+        move, _, _, value = best
+        # Features of the afterstate, for GUI plotting
+        after = apply_move(track(state), move)
+        return move, value, after.empty, after.mono, after.merge
@@ -1,7 +1,14 @@
 import random
-from game_2048 import Game2048
+from game_engine import Game2048
 
 class RandomAgent:
 
     def get_action(self, game_state: Game2048):
-        return random.choice(["Up", "Down", "Left", "Right"]), 0, 0, 0, 0
\ No newline at end of file
+        return random.choice(["Up", "Down", "Left", "Right"]), 0, 0, 0, 0
+
+    def get_batch_actions(self, candidates, valid):
+        """Vectorized get_action for batch_engine.BatchGames: one random move per game."""
+        import numpy as np
+
+        rng = np.random.default_rng(random.getrandbits(64))
+        return rng.integers(0, 4, size=len(valid))
\ No newline at end of file
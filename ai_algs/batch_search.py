@@ -0,0 +1,153 @@
+"""
+Level-synchronous Expectimax over NumPy arrays of packed boards.
+
+Instead of one recursive call per node, the tree is expanded a whole ply at
+a time: every board of a level is deduplicated with np.unique, the children
+of all chance nodes (every spawn) or max nodes (every move, via
+batch_engine.move_all) are generated in one array operation, the leaves are
+scored with the agent's _batch_heuristic over feature arrays, and values
+flow back up as max over moves and probability-weighted sums over spawns.
+
+Values are exactly those of ExpectimaxSearch._expectimax without a cache:
+spawns are summed in the recursive search's order (empty cells row-major
+on the board's canonical form, each tile in SPAWNS order) and max nodes keep the first best move, so both
+searches pick the same moves. A board is expanded once per level however
+many parents share it, so node counts are of distinct boards per level.
+"""
+import numpy as np
+
+import symmetry
+
+from batch_engine import move_all, transpose, cell_exponents
+from bitboard import ROW_MAX
+from ai_algs.heuristics import (
+    LINE_EMPTY, LINE_MERGE, LINE_MONO, LINE_LOG_SUM, LINE_SNAKE_LTR, LINE_SNAKE_RTL,
+)
+
+_ROW_MASK = np.uint64(0xFFFF)
+_ROW_SHIFTS = np.array([0, 16, 32, 48], dtype=np.uint64)
+_CORNERS = [0, 3, 12, 15]
+
+_EMPTY = np.array(LINE_EMPTY, dtype=np.int64)
+_MERGE = np.array(LINE_MERGE, dtype=np.int64)
+_MONO = np.array(LINE_MONO, dtype=np.int64)
+_MAX = np.array(ROW_MAX, dtype=np.int64)
+# Snake gradient of a row by its index (see heuristics.snake_features)
+_GRADIENT = np.array([
+    (16 - 4 * i) * np.array(LINE_LOG_SUM, dtype=np.int64) - np.array(snake, dtype=np.int64)
+    for i, snake in enumerate((LINE_SNAKE_LTR, LINE_SNAKE_RTL, LINE_SNAKE_LTR, LINE_SNAKE_RTL))
+])
+
+
+def _lines(boards):
+    return ((boards[:, None] >> _ROW_SHIFTS) & _ROW_MASK).astype(np.intp)
+
+
+def board_features(boards):
+    """The features the agents' heuristics read (see their _compute_features), as arrays over boards."""
+    rows = _lines(boards)
+    cols = _lines(transpose(boards))
+    max_exp = _MAX[rows].max(axis=1)
+    corners = cell_exponents(boards)[:, _CORNERS]
+    return {
+        'max_exp': max_exp,
+        'empty': _EMPTY[rows].sum(axis=1),
+        'merge': _MERGE[rows].sum(axis=1) + _MERGE[cols].sum(axis=1),
+        'monotonicity': _MONO[rows].sum(axis=1) + _MONO[cols].sum(axis=1),
+        'gradient': _GRADIENT[np.arange(4), rows].sum(axis=1).astype(np.float64),
+        'corner': (corners == max_exp[:, None]).any(axis=1).astype(np.int64),
+    }
+
+
+def evaluate_roots(agent, children, depth):
+    """Returns agent._expectimax(child, depth, True) for every root child (a FeatureState)."""
+    boards = np.array([child.board for child in children], dtype=np.uint64)
+    values = _values(agent, boards, depth, True)
+    return [(float(value), agent._compute_features(child)) for value, child in zip(values, children)]
+
+
+def _values(agent, boards, depth, chance):
+    """Expectimax values of a level of boards with depth plies left below them."""
+    boards, inverse = np.unique(boards, return_inverse=True)
+    values = np.empty(len(boards))
+    if chance:
+        empty = cell_exponents(boards) == 0
+        # A chance node with no empty cell spawns nothing, whether or not the game is over
+        expand = empty.any(axis=1) if depth > 0 else np.zeros(len(boards), dtype=bool)
+    else:
+        candidates, _ = move_all(boards)
+        valid = candidates != boards[:, None]
+        expand = valid.any(axis=1) if depth > 0 else np.zeros(len(boards), dtype=bool)
+
+    leaves = ~expand
+    if leaves.any():
+        agent.nodes['leaf'] += int(leaves.sum())
+        values[leaves] = agent._batch_heuristic(board_features(boards[leaves]))
+    if expand.any():
+        if chance:
+            values[expand] = _chance_values(agent, boards[expand], empty[expand], depth)
+        else:
+            values[expand] = _max_values(agent, candidates[expand], valid[expand], depth)
+    return values[inverse.reshape(-1)]
+
+
+def _chance_values(agent, boards, empty, depth):
+    from ai_algs.expectimax_search import SPAWNS
+
+    agent.nodes['chance'] += len(boards)
+    # One row per (node, empty cell), ordered by node and then cell
+    node, cell = np.nonzero(empty)
+    if agent.symmetries == symmetry.DIAGONAL:
+        # Boards whose transpose is canonical visit their cells column by column
+        flipped = (transpose(boards) < boards)[node]
+        rank = np.where(flipped, (cell % 4) * 4 + cell // 4, cell)
+        order = np.lexsort((rank, node))
+        node, cell = node[order], cell[order]
+    shifts = cell.astype(np.uint64) * np.uint64(4)
+    spawned = np.stack(
+        [boards[node] | (np.uint64(tile.bit_length() - 1) << shifts) for tile, _ in SPAWNS], axis=1
+    )
+    child_values = _values(agent, spawned.reshape(-1), depth - 1, False).reshape(len(node), len(SPAWNS))
+
+    # Accumulate in the recursive search's order so the float sums are identical
+    counts = empty.sum(axis=1)
+    slot = np.arange(len(node)) - (np.cumsum(counts) - counts)[node]
+    totals = np.zeros(len(boards))
+    for k in range(int(counts.max())):
+        at = slot == k
+        parents = node[at]
+        for i, (_, tile_prob) in enumerate(SPAWNS):
+            totals[parents] += (tile_prob * child_values[at, i]) / counts[parents]
+    return totals
+
+
+def _max_values(agent, candidates, valid, depth):
+    agent.nodes['max'] += len(candidates)
+    values = np.full(valid.shape, -np.inf)
+    values[valid] = _values(agent, candidates[valid], depth - 1, True)
+    return values.max(axis=1)
+
+
+def batch_actions(agent, candidates, valid, boards=None):
+    """
+    get_batch_actions for a search agent (see batch_engine.py): searches the
+    children of every board together, so boards shared between games or
+    subtrees are expanded once. Returns the best move index of each board.
+    Given the boards themselves, the agent's book is consulted first and only
+    the positions it misses are searched.
+    """
+    from bitboard import MOVES
+
+    actions = np.full(len(candidates), -1, dtype=np.intp)
+    if agent.book is not None and boards is not None:
+        for i, board in enumerate(boards):
+            move = agent.book.lookup(int(board))
+            if move is not None and valid[i, MOVES.index(move)]:
+                actions[i] = MOVES.index(move)
+    search = actions < 0
+    if search.any():
+        valid = valid[search]
+        values = np.full(valid.shape, -np.inf)
+        values[valid] = _values(agent, candidates[search][valid], agent.depth - 1, True)
+        actions[search] = values.argmax(axis=1)
+    return actions
@@ -0,0 +1,453 @@
+import gc
+import math
+import random
+import time
+
+from ai_algs.feature_state import rules_for
+from ai_algs.transposition import TranspositionTable
+from ai_algs.parallel import SearchPool
+import symmetry
+
+# Tile spawned on an empty cell and its probability
+SPAWNS = [(2, 0.9), (4, 0.1)]
+
+# Share of a move's time budget held back for work the deadline checks cannot
+# interrupt (a transposition table resize, finishing the move)
+TIME_MARGIN = 0.1
+# Largest transposition table in timed search: rehashing a bigger one stalls for
+# longer than the margin
+TIMED_CACHE_ENTRIES = 20_000
+
+
+def linear_bounds(terms):
+    """(low, high) of the sum of weight * x over terms of (weight, low x, high x)."""
+    return (sum(min(w * lo, w * hi) for w, lo, hi in terms),
+            sum(max(w * lo, w * hi) for w, lo, hi in terms))
+
+
+class _SearchTimeout(Exception):
+    """Raised inside the search when the per-move time budget runs out."""
+
+
+class ExpectimaxSearch:
+    """
+    Depth-limited expectimax search shared by ExpectimaxAgent and SnakeExpectimaxAgent.
+    Subclasses provide _compute_features(state), _heuristic(features),
+    _plot_values(features) and the symmetry group their heuristic is invariant under.
+    Search runs on FeatureStates, so _compute_features can read feature totals directly.
+
+    Chance nodes can be pruned three ways, all off by default:
+      min_prob          score a path as a leaf once its cumulative probability drops below this
+      chance_samples    expand at most this many randomly chosen empty cells per chance node
+      four_spawn_plies  only expand 4-tile spawns at chance nodes this many plies below the
+                        root or fewer (the root's children are ply 1); deeper ones assume a 2
+    Pruned values are cached like exact ones, so the cache becomes approximate too.
+
+    With time_limit_ms set, get_action searches depth 1, 2, 3, ... until the budget
+    runs out and plays the best move of the deepest completed iteration. depth then
+    acts as the base depth cap, raised on crowded boards where branching is low.
+    Timed search always runs in this process, ignoring workers. It stops TIME_MARGIN
+    of the budget early, keeps at most TIMED_CACHE_ENTRIES cached results and holds
+    off the cyclic garbage collector until the move is returned.
+
+    evaluator replaces the heuristic at the leaves with a learned value function
+    (e.g. ai_algs.ntuple.NTupleNetwork): leaves score evaluator.value(board) after a
+    move, or evaluator.state_value(board) before one, and every move adds the points it
+    makes. Values then count only points still to come, so they depend on the board
+    alone and can be cached however the board was reached. The cache does not share
+    entries between symmetric boards with an evaluator, whose values are not symmetric.
+
+    book (an ai_algs.position_book.PositionBook) is consulted before searching; a
+    hit plays the stored move at once (reported as depth 0), a miss searches as usual.
+
+    batched=True expands the tree a ply at a time over NumPy arrays (see
+    ai_algs/batch_search.py), scoring leaves with _batch_heuristic. It picks the
+    same moves as the recursive search but supports none of the pruning, timing,
+    worker or evaluator options, and only 4x4 boards. It keeps no transposition
+    table, so cache_size is ignored; a level's duplicate boards are merged instead.
+
+    Games of any size are searched (see nboard.py); get_action switches the
+    board operations to the game's size. The evaluator and book are 4x4 only.
+
+    pruning=True adds Star1 cutoffs, which leave the chosen move unchanged: a chance
+    node stops expanding spawns once even the heuristic's upper bound on the rest
+    (see _heuristic_bounds) cannot lift its average to the best sibling found so
+    far, alpha. A cut-off node returns that bound instead of its value, so only
+    values of at least alpha are cached. prune_counts tallies the spawns searched
+    and skipped. move_ordering sorts max nodes' moves so good ones come first and
+    raise alpha early: "heuristic" by their afterstate's heuristic, "history" by
+    trying the move that was best for the board last time. Pruning excludes the
+    evaluator, workers, time limit and batched search.
+    """
+    symmetries = symmetry.IDENTITY
+
+    def __init__(self, depth=3, cache_size=100_000, workers=0, parallel_split="chance",
+                 min_prob=0.0, chance_samples=None, four_spawn_plies=None, time_limit_ms=None,
+                 evaluator=None, book=None, batched=False, pruning=False, move_ordering=None):
+        if pruning and (batched or workers > 1 or time_limit_ms is not None or evaluator is not None):
+            raise ValueError("pruning only supports the heuristic in this process at a fixed depth")
+        if move_ordering not in (None, "heuristic", "history"):
+            raise ValueError(f"unknown move ordering: {move_ordering!r}")
+        if batched and (workers > 1 or min_prob or chance_samples is not None or four_spawn_plies is not None
+                        or time_limit_ms is not None or evaluator is not None):
+            raise ValueError("batched search only supports depth, book and the heuristic")
+        if batched and self.symmetries not in (symmetry.IDENTITY, symmetry.DIAGONAL):
+            raise ValueError("batched search only orders spawns for the identity and diagonal groups")
+        self.depth = depth
+        self.batched = batched
+        self.evaluator = evaluator
+        if evaluator is not None:
+            # Learned values are not symmetric like the heuristics (n-tuple networks weight
+            # rows, columns and squares apart), so the cache keys on the raw board
+            self.symmetries = symmetry.IDENTITY
+        self.book = book
+        # Transposition table reused across moves; cache_size=0 disables it
+        self.cache = TranspositionTable(cache_size) if cache_size and not batched else None
+        # workers > 1 evaluates the root subtrees on a persistent process pool
+        self.workers = workers
+        self.parallel_split = parallel_split
+        self._pool = None
+        self.min_prob = min_prob
+        self.chance_samples = chance_samples
+        self.four_spawn_plies = four_spawn_plies
+        self.time_limit_ms = time_limit_ms
+        if time_limit_ms is not None and self.cache is not None and cache_size > TIMED_CACHE_ENTRIES:
+            self.cache = TranspositionTable(TIMED_CACHE_ENTRIES)
+        self._deadline = None
+        self._root_depth = depth
+        self.pruning = pruning
+        self.move_ordering = move_ordering
+        # Best move last found for each board, for "history" ordering
+        self._best_moves = TranspositionTable(cache_size or 100_000) if move_ordering == "history" else None
+        # Spawns searched and skipped under pruned chance nodes
+        self.prune_counts = {'searched': 0, 'pruned': 0}
+        # Nodes expanded by this process since the agent was created
+        self.nodes = {'max': 0, 'chance': 0, 'leaf': 0}
+        # Depth searched for the last move and, when timed, (depth, ms) of each completed iteration
+        self.last_depth = 0
+        self.last_iterations = []
+        self.size = None
+        self._use_size(4)
+
+    def _use_size(self, size):
+        """Binds the board operations of the given size for the search."""
+        if size == self.size:
+            return
+        if size != 4 and (self.evaluator is not None or self.book is not None or self.batched):
+            raise ValueError("the evaluator, book and batched search only support 4x4 boards")
+        # Workers and cached values belong to the old size
+        self.close()
+        if self.cache is not None:
+            self.cache = TranspositionTable(self.cache.max_entries)
+        if self._best_moves is not None:
+            self._best_moves = TranspositionTable(self._best_moves.max_entries)
+        rules = rules_for(size)
+        self.size = size
+        self._track = rules.track
+        self._apply_move = rules.apply_move
+        self._place_tile = rules.place_tile
+        self._valid_moves = rules.valid_moves
+        self._is_game_over = rules.is_game_over
+        self._empty_cells = rules.empty_cells
+        self._canonical_board = rules.canonical_board
+        self._canonical_cells = rules.canonical_cells
+
+    def get_action(self, game):
+        if self.time_limit_ms is None:
+            return self._choose(game)
+        # A garbage collection pass can outlast the whole budget, so in timed
+        # search the collector only resumes once the move is chosen
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return self._choose(game)
+        finally:
+            if collecting:
+                gc.enable()
+
+    def _choose(self, game):
+        best_move = None
+        best_value = -math.inf
+        best_features = None
+        self._use_size(getattr(game, 'size', 4))
+        state = self._track(game.get_state())
+        moves = self._valid_moves(state)
+        self.last_iterations = []
+        if self.book is not None:
+            move = self.book.lookup(state.board)
+            if move in moves:
+                self.last_depth = 0
+                return (move,) + self._plot_values(self._compute_features(self._apply_move(state, move)))
+        if self.pruning:
+            results = self._pruned_roots(state, moves, self.depth)
+            self.last_depth = self.depth
+        elif self.time_limit_ms is None:
+            results = self._evaluate_roots([self._apply_move(state, move) for move in moves], self.depth)
+            self.last_depth = self.depth
+        else:
+            moves, results = self._iterative_deepening(state, moves)
+        for move, (value, features) in zip(moves, results):
+            if self.evaluator is not None:
+                value += self._apply_move(state, move).score - state.score
+            if value > best_value:
+                best_value = value
+                best_move = move
+                best_features = features
+
+        # Move plus feature values for GUI plotting
+        return (best_move,) + self._plot_values(best_features)
+
+    def get_batch_actions(self, candidates, valid, boards=None):
+        """
+        Vectorized get_action for batch_engine.BatchGames and game_server.py: one
+        batched search (see batched above) over the children of every board.
+        The book is only consulted when the boards themselves are passed, as
+        game_server.py does; BatchGames passes just their children.
+        """
+        from ai_algs.batch_search import batch_actions
+        return batch_actions(self, candidates, valid, boards)
+
+    def _evaluate_roots(self, children, depth):
+        self._root_depth = depth
+        if self.batched:
+            from ai_algs.batch_search import evaluate_roots
+            return evaluate_roots(self, children, depth - 1)
+        if self.workers > 1:
+            if self._pool is None:
+                self._pool = SearchPool(self, self.workers, self.parallel_split)
+            return self._pool.evaluate(children, depth - 1)
+        return [self._expectimax(child, depth - 1, True) for child in children]
+
+    @property
+    def pruned_fraction(self):
+        """Fraction of chance-node spawns skipped by pruning so far."""
+        total = self.prune_counts['searched'] + self.prune_counts['pruned']
+        return self.prune_counts['pruned'] / total if total else 0.0
+
+    def _heuristic_bounds(self, state, plies):
+        """
+        (low, high) bounds on _heuristic over every board reachable from state
+        within plies moves and spawns. Subclasses supporting pruning override it.
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no heuristic bounds to prune with")
+
+    def _order_moves(self, board, children):
+        """The moves of children (move -> afterstate, in MOVES order) in the order to search them."""
+        moves = list(children)
+        if self.move_ordering == "heuristic":
+            # sort is stable, so tied moves keep MOVES order
+            moves.sort(key=lambda move: -self._heuristic(self._compute_features(children[move])))
+        elif self.move_ordering == "history":
+            best = self._best_moves.get(board)
+            if best in children:
+                moves.remove(best)
+                moves.insert(0, best)
+        return moves
+
+    def _pruned_roots(self, state, moves, depth):
+        """_evaluate_roots for pruned search: each move is searched with the best value so far as alpha."""
+        self._root_depth = depth
+        children = {move: self._apply_move(state, move) for move in moves}
+        results = {}
+        best = -math.inf
+        for move in self._order_moves(state.board, children):
+            results[move] = self._pruned(children[move], depth - 1, True, 1.0, best)
+            best = max(best, results[move][0])
+        if self._best_moves is not None and moves:
+            # The move get_action picks: the first in MOVES order with the best value
+            self._best_moves.put(state.board, next(move for move in moves if results[move][0] == best))
+        return [results[move] for move in moves]
+
+    def _depth_limit(self, state):
+        """Deepest timed iteration: crowded boards branch less, so they can afford more plies."""
+        empties = len(self._empty_cells(state))
+        return self.depth + (2 if empties <= 4 else 1 if empties <= 8 else 0)
+
+    def _iterative_deepening(self, state, moves):
+        """
+        Returns (moves, results) from the deepest iteration that fits in the time budget.
+        Each iteration searches the previous best move first, so when the budget runs out
+        mid-iteration the moves finished so far are still comparable: if one of them beat
+        the previous best at the deeper depth it is preferred.
+        """
+        start = time.perf_counter()
+        deadline = start + self.time_limit_ms * (1 - TIME_MARGIN) / 1000
+        best = self._deepen(state, moves, start, deadline)
+        # Report in the usual move order so ties break as in fixed-depth search
+        best.sort(key=lambda item: moves.index(item[0]))
+        return [move for move, _ in best], [result for _, result in best]
+
+    def _deepen(self, state, moves, start, deadline):
+        """The iterations of _iterative_deepening; returns the (move, result) pairs of the last one."""
+        children = {move: self._apply_move(state, move) for move in moves}
+        order = list(moves)
+        # Depth 1 only scores the children, so it always completes
+        best = [(move, self._expectimax(children[move], 0, True)) for move in order]
+        self.last_depth = 1
+        self.last_iterations.append((1, (time.perf_counter() - start) * 1000))
+        last_elapsed = None
+        for depth in range(2, self._depth_limit(state) + 1):
+            order = [move for move, _ in sorted(best, key=lambda item: -item[1][0])]
+            iter_start = time.perf_counter()
+            # Skip an iteration that would not finish, judging by the previous one's cost
+            if last_elapsed is not None and iter_start + last_elapsed * 4 > deadline:
+                break
+            done = []
+            self._root_depth = depth
+            self._deadline = deadline
+            try:
+                for move in order:
+                    # Nor start a root move that would not finish
+                    if last_elapsed is not None and time.perf_counter() + last_elapsed * 4 / len(order) > deadline:
+                        raise _SearchTimeout()
+                    done.append((move, self._expectimax(children[move], depth - 1, True)))
+            except _SearchTimeout:
+                if done:
+                    best = done
+                break
+            finally:
+                self._deadline = None
+            best = done
+            self.last_depth = depth
+            last_elapsed = time.perf_counter() - iter_start
+            self.last_iterations.append((depth, last_elapsed * 1000))
+        return best
+
+    def close(self):
+        """Shuts down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def _expectimax(self, state, depth, chance, prob=1.0):
+        if prob < self.min_prob and depth > 0:
+            return self._leaf(state, chance)
+        if self.cache is None:
+            return self._search(state, depth, chance, prob)
+        key = (self._canonical_board(state.board, self.symmetries), depth, chance)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._search(state, depth, chance, prob)
+            self.cache.put(key, result)
+        return result
+
+    def _pruned(self, state, depth, chance, prob, alpha):
+        """_expectimax with Star1 cutoffs: results below alpha may be upper bounds rather than values."""
+        if prob < self.min_prob and depth > 0:
+            return self._leaf(state, chance)
+        if self.cache is None:
+            return self._search_pruned(state, depth, chance, prob, alpha)
+        key = (self._canonical_board(state.board, self.symmetries), depth, chance)
+        result = self.cache.get(key)
+        if result is None:
+            result = self._search_pruned(state, depth, chance, prob, alpha)
+            if result[0] >= alpha:
+                self.cache.put(key, result)
+        return result
+
+    def _search_pruned(self, state, depth, chance, prob, alpha):
+        if depth == 0 or self._is_game_over(state):
+            return self._leaf(state, chance)
+
+        if not chance:
+            self.nodes['max'] += 1
+            children = {move: self._apply_move(state, move) for move in self._valid_moves(state)}
+            best = -math.inf
+            best_feat = None
+            best_move = None
+            for move in self._order_moves(state.board, children):
+                val, feat = self._pruned(children[move], depth - 1, True, prob, max(alpha, best))
+                if val > best:
+                    best = val
+                    best_feat = feat
+                    best_move = move
+            if self._best_moves is not None and best_move is not None:
+                self._best_moves.put(state.board, best_move)
+            return best, best_feat
+
+        children = self._chance_children(state, depth)
+        if not children:
+            return self._leaf(state, chance)
+        self.nodes['chance'] += 1
+        # With no alpha yet nothing can be cut, so skip computing the bound
+        high = self._heuristic_bounds(state, depth)[1] if alpha > -math.inf else 0.0
+        # Cut only by a clear margin, so float rounding in the bounds never decides a cutoff
+        alpha -= 1e-9 * (abs(alpha) + abs(high) + 1)
+        total = 0.0
+        remaining = 1.0
+        for i, (tile_prob, count, succ) in enumerate(children):
+            weight = tile_prob / count
+            remaining -= weight
+            # The child value below which this node cannot reach alpha even if the rest score high
+            val, _ = self._pruned(succ, depth - 1, False, prob * tile_prob / count,
+                                  (alpha - total - remaining * high) / weight)
+            total += (tile_prob * val) / count
+            if total + remaining * high < alpha:
+                self.prune_counts['searched'] += i + 1
+                self.prune_counts['pruned'] += len(children) - i - 1
+                return total + remaining * high, self._compute_features(state)
+        self.prune_counts['searched'] += len(children)
+        return total, self._compute_features(state)
+
+    def _leaf(self, state, chance):
+        self.nodes['leaf'] += 1
+        feat = self._compute_features(state)
+        if self.evaluator is not None:
+            # Chance nodes hold afterstates, which is what value networks score
+            if chance:
+                return self.evaluator.value(state.board), feat
+            return self.evaluator.state_value(state.board), feat
+        return self._heuristic(feat), feat
+
+    def _batch_heuristic(self, features):
+        """_heuristic over the feature arrays of ai_algs.batch_search.board_features."""
+        return self._heuristic(features)
+
+    def _search(self, state, depth, chance, prob):
+        # Terminal check
+        if depth == 0 or self._is_game_over(state):
+            return self._leaf(state, chance)
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+
+        if chance:
+            # Chance node: average over tile spawns
+            children = self._chance_children(state, depth)
+            if not children:
+                return self._leaf(state, chance)
+            self.nodes['chance'] += 1
+            total = 0.0
+            for tile_prob, count, succ in children:
+                val, _ = self._expectimax(succ, depth - 1, False, prob * tile_prob / count)
+                total += (tile_prob * val) / count
+            return total, self._compute_features(state)
+
+        # Max node: pick best move
+        self.nodes['max'] += 1
+        best = -math.inf
+        best_feat = None
+        for move in self._valid_moves(state):
+            succ = self._apply_move(state, move)
+            val, feat = self._expectimax(succ, depth - 1, True, prob)
+            if self.evaluator is not None:
+                val += succ.score - state.score
+            if val > best:
+                best = val
+                best_feat = feat
+        return best, best_feat
+
+    def _chance_children(self, state, depth):
+        """Returns (tile probability, cells expanded, child) for every spawn under a chance node."""
+        # Spawns are summed in the canonical board's cell order, so boards sharing a
+        # cache entry get bit-identical values and cached search picks uncached moves
+        empties = self._canonical_cells(state.board, self._empty_cells(state), self.symmetries)
+        if self.chance_samples is not None and len(empties) > self.chance_samples:
+            empties = random.sample(empties, self.chance_samples)
+        spawns = SPAWNS
+        if self.four_spawn_plies is not None and self._root_depth - depth > self.four_spawn_plies:
+            spawns = [(2, 1.0)]
+        return [
+            (tile_prob, len(empties), self._place_tile(state, r, c, tile))
+            for r, c in empties
+            for tile, tile_prob in spawns
+        ]
@@ -0,0 +1,256 @@
+"""
+Game states that carry their heuristic feature totals.
+
+A FeatureState is a GameState (see game_state.py) extended with the board's
+transpose and running totals of every term in ai_algs/heuristics.py. Placing
+a tile adjusts only the terms of the one row and one column it lands in; a
+move adjusts only the rows and columns whose packed line changed. Search can
+then read features in constant time instead of re-evaluating each leaf.
+
+All summed terms of a line are packed into one int (see _ROW_TERMS), so a
+line changes the totals with a single table lookup and add. Each field's
+board total fits its bit width, so the packed sum never carries between
+fields and stays exact under subtraction.
+
+Other board sizes (nboard.py) use SizedRules; rules_for(size) returns the
+operations search needs for either.
+"""
+import functools
+from typing import NamedTuple
+
+import game_state
+import symmetry
+from nboard import geometry
+from bitboard import (
+    ROW_MASK, ROW_MAX, ROW_LEFT, ROW_RIGHT, SCORE_LEFT, SCORE_RIGHT,
+    move_rows, transpose, tile_to_exponent,
+)
+from ai_algs.heuristics import (
+    LINE_EMPTY, LINE_MERGE, LINE_MONO, LINE_LOG_SUM, LINE_SNAKE_LTR, LINE_SNAKE_RTL,
+)
+
+# Bit offsets of the packed totals: empty (<= 16), merge (<= 24),
+# monotonicity (19 bits) and snake gradient (<= 4 rows * 16 * 60).
+# A line's monotonicity reaches 2 * 32768 ([X, 0, X, 0]), but not every line at
+# once: the board total is a sum of max(a - b, 0) terms, convex in the tiles, so
+# it peaks with every tile 0 or 32768, and checking those 2**16 boards gives
+# at most 12 * 32768 = 393216 < 2**19.
+_MERGE_SHIFT = 5
+_MONO_SHIFT = 10
+_GRADIENT_SHIFT = 29
+
+# Row i adds its snake gradient (16 - 4i) * log sum minus the snake-direction
+# weighting (see heuristics.snake_features); columns add only merge and monotonicity
+_ROW_TERMS = tuple(
+    [
+        empty | merge << _MERGE_SHIFT | mono << _MONO_SHIFT
+        | ((16 - 4 * i) * log_sum - snake_weight) << _GRADIENT_SHIFT
+        for empty, merge, mono, log_sum, snake_weight
+        in zip(LINE_EMPTY, LINE_MERGE, LINE_MONO, LINE_LOG_SUM, snake)
+    ]
+    for i, snake in enumerate((LINE_SNAKE_LTR, LINE_SNAKE_RTL, LINE_SNAKE_LTR, LINE_SNAKE_RTL))
+)
+_COL_TERMS = [merge << _MERGE_SHIFT | mono << _MONO_SHIFT for merge, mono in zip(LINE_MERGE, LINE_MONO)]
+_ROWS = tuple(zip((0, 16, 32, 48), _ROW_TERMS))
+
+
+class FeatureState(NamedTuple):
+    board: int
+    score: int
+    cols: int  # transpose(board): column c is the packed line at bits 16*c
+    totals: int  # packed sums of the line terms
+    max_exp: int
+
+    @property
+    def empty(self):
+        return self.totals & 0x1F
+
+    @property
+    def merge(self):
+        return (self.totals >> _MERGE_SHIFT) & 0x1F
+
+    @property
+    def mono(self):
+        return (self.totals >> _MONO_SHIFT) & 0x7FFFF
+
+    @property
+    def gradient(self):
+        return self.totals >> _GRADIENT_SHIFT
+
+    @property
+    def corners(self):
+        board = self.board
+        return board & 0xF, (board >> 12) & 0xF, (board >> 48) & 0xF, board >> 60
+
+
+def track(state):
+    """Builds a FeatureState from any state with board and score, evaluating every line once."""
+    board = state.board
+    cols = transpose(board)
+    totals = max_exp = 0
+    for i, row_terms in _ROWS:
+        row = (board >> i) & ROW_MASK
+        totals += row_terms[row] + _COL_TERMS[(cols >> i) & ROW_MASK]
+        max_exp = max(max_exp, ROW_MAX[row])
+    return FeatureState(board, state.score, cols, totals, max_exp)
+
+
+def apply_move(state, move):
+    """Returns the FeatureState after sliding the board in the given direction."""
+    board, score, cols, totals, max_exp = state
+    if move == "Left":
+        new_board, gained = move_rows(board, ROW_LEFT, SCORE_LEFT)
+        new_cols = transpose(new_board)
+    elif move == "Right":
+        new_board, gained = move_rows(board, ROW_RIGHT, SCORE_RIGHT)
+        new_cols = transpose(new_board)
+    elif move == "Up":
+        new_cols, gained = move_rows(cols, ROW_LEFT, SCORE_LEFT)
+        new_board = transpose(new_cols)
+    elif move == "Down":
+        new_cols, gained = move_rows(cols, ROW_RIGHT, SCORE_RIGHT)
+        new_board = transpose(new_cols)
+    else:
+        raise ValueError(f"unknown move: {move!r}")
+    if new_board == board:
+        return state
+
+    for i, row_terms in _ROWS:
+        old = (board >> i) & ROW_MASK
+        new = (new_board >> i) & ROW_MASK
+        if old != new:
+            totals += row_terms[new] - row_terms[old]
+            if ROW_MAX[new] > max_exp:
+                max_exp = ROW_MAX[new]
+        old = (cols >> i) & ROW_MASK
+        new = (new_cols >> i) & ROW_MASK
+        if old != new:
+            totals += _COL_TERMS[new] - _COL_TERMS[old]
+    return FeatureState(new_board, score + gained, new_cols, totals, max_exp)
+
+
+def place_tile(state, r, c, value):
+    """Returns the FeatureState with a tile of the given value placed on the empty cell (r, c)."""
+    exponent = tile_to_exponent(value)
+    board, score, cols, totals, max_exp = state
+    row_terms = _ROW_TERMS[r]
+    old_row = (board >> (16 * r)) & ROW_MASK
+    old_col = (cols >> (16 * c)) & ROW_MASK
+    return FeatureState(
+        board | (exponent << (16 * r + 4 * c)),
+        score,
+        cols | (exponent << (16 * c + 4 * r)),
+        totals
+        + row_terms[old_row | (exponent << (4 * c))] - row_terms[old_row]
+        + _COL_TERMS[old_col | (exponent << (4 * r))] - _COL_TERMS[old_col],
+        exponent if exponent > max_exp else max_exp,
+    )
+
+
+class SizedFeatureState(NamedTuple):
+    """FeatureState for an NxN board (see nboard.py), with the totals recomputed per state."""
+    board: int
+    score: int
+    cols: int
+    empty: int
+    merge: int
+    mono: int
+    gradient: int
+    max_exp: int
+    corners: tuple
+
+
+class SizedRules:
+    """
+    The search operations of this module and game_state.py for NxN boards.
+    The packed totals above only fit 4x4 boards, so each state sums its 2N
+    lines' memoized terms (nboard.Geometry.terms) afresh.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.geometry = geometry(size)
+        # Snake weight of row i (see heuristics.snake_features): N*N - N*i per log, minus the in-row weighting
+        self._rows = [(size * size - size * i, 4 if i % 2 == 0 else 5) for i in range(size)]
+
+    def __reduce__(self):
+        return rules_for, (self.size,)
+
+    def _state(self, board, score, cols):
+        geo = self.geometry
+        terms = geo.terms
+        empty = merge = mono = gradient = max_exp = 0
+        for (weight, snake), row in zip(self._rows, geo.rows(board)):
+            t = terms[row]
+            empty += t[0]
+            merge += t[1]
+            mono += t[2]
+            gradient += weight * t[3] - t[snake]
+            if t[6] > max_exp:
+                max_exp = t[6]
+        for col in geo.rows(cols):
+            t = terms[col]
+            merge += t[1]
+            mono += t[2]
+        last = self.size - 1
+        corners = (geo.get_cell(board, 0, 0), geo.get_cell(board, 0, last),
+                   geo.get_cell(board, last, 0), geo.get_cell(board, last, last))
+        return SizedFeatureState(board, score, cols, empty, merge, mono, gradient, max_exp, corners)
+
+    def track(self, state):
+        return self._state(state.board, state.score, self.geometry.transpose(state.board))
+
+    def apply_move(self, state, move):
+        geo = self.geometry
+        board, gained = geo.move(state.board, move)
+        if board == state.board:
+            return state
+        return self._state(board, state.score + gained, geo.transpose(board))
+
+    def place_tile(self, state, r, c, value):
+        geo = self.geometry
+        exponent = tile_to_exponent(value)
+        return self._state(geo.set_cell(state.board, r, c, exponent), state.score,
+                           geo.set_cell(state.cols, c, r, exponent))
+
+    def valid_moves(self, state):
+        return self.geometry.valid_moves(state.board)
+
+    def is_game_over(self, state):
+        return self.geometry.is_game_over(state.board)
+
+    def empty_cells(self, state):
+        return self.geometry.empty_cells(state.board)
+
+    def canonical_board(self, board, group):
+        # Only the transpose is implemented off 4x4; a smaller group only costs cache hits
+        if group == symmetry.IDENTITY:
+            return board
+        return min(board, self.geometry.transpose(board))
+
+    def canonical_cells(self, board, cells, group):
+        # symmetry.canonical_cell_order for the transpose only, matching canonical_board
+        if group == symmetry.IDENTITY or self.geometry.transpose(board) >= board:
+            return cells
+        return sorted(cells, key=lambda cell: (cell[1], cell[0]))
+
+
+class _Rules4(NamedTuple):
+    track: object
+    apply_move: object
+    place_tile: object
+    valid_moves: object
+    is_game_over: object
+    empty_cells: object
+    canonical_board: object
+    canonical_cells: object
+
+
+_RULES_4 = _Rules4(track, apply_move, place_tile, game_state.valid_moves, game_state.is_game_over,
+                   game_state.empty_cells, symmetry.canonical_board,
+                   symmetry.canonical_cell_order)
+
+
+@functools.lru_cache(maxsize=None)
+def rules_for(size):
+    """The search operations (see _Rules4) of a board size."""
+    return _RULES_4 if size == 4 else SizedRules(size)
@@ -0,0 +1,92 @@
+"""
+Shared heuristic features evaluated with precomputed per-line tables.
+
+Every feature the agents use decomposes into terms over single rows and
+columns, so each term is tabulated once per process for all 65,536 packed
+lines (see bitboard.py). A board is then evaluated with lookups on its four
+rows and the four rows of its transpose (its columns, read top to bottom).
+"""
+import itertools
+
+from bitboard import ROW_MASK, ROW_EMPTY_COLS, ROW_MAX, exponent_to_tile, transpose
+
+SIZE = 4
+
+
+def _build_tables():
+    values = [0] + [1 << e for e in range(1, 16)]
+    # Terms of two neighbouring cells, by exponent
+    pair_merge = [[1 if a == b and a else 0 for b in range(16)] for a in range(16)]
+    pair_mono = [[values[a] - values[b] if a >= b else 0 for b in range(16)] for a in range(16)]
+    # Every packed line in index order: the last product element is the lowest nibble
+    lines = list(itertools.product(range(16), repeat=SIZE))
+    return (
+        [pair_merge[c0][c1] + pair_merge[c1][c2] + pair_merge[c2][c3] for c3, c2, c1, c0 in lines],
+        [pair_mono[c0][c1] + pair_mono[c1][c2] + pair_mono[c2][c3] for c3, c2, c1, c0 in lines],
+        [c0 + c1 + c2 + c3 for c3, c2, c1, c0 in lines],
+        [c1 + 2 * c2 + 3 * c3 for c3, c2, c1, c0 in lines],
+        [3 * c0 + 2 * c1 + c2 for c3, c2, c1, c0 in lines],
+    )
+
+
+# Per-line terms, indexed by the packed 16-bit line:
+#   LINE_MERGE      adjacent equal non-empty tiles
+#   LINE_MONO       sum of drops between neighbours that do not increase, in tile values
+#   LINE_LOG_SUM    sum of log2 exponents
+#   LINE_SNAKE_LTR  exponents weighted by their index from the left
+#   LINE_SNAKE_RTL  exponents weighted by their index from the right
+#   LINE_EMPTY      empty cells
+LINE_MERGE, LINE_MONO, LINE_LOG_SUM, LINE_SNAKE_LTR, LINE_SNAKE_RTL = _build_tables()
+LINE_EMPTY = [len(cols) for cols in ROW_EMPTY_COLS]
+
+
+def _lines(board):
+    cols = transpose(board)
+    return (
+        board & ROW_MASK, (board >> 16) & ROW_MASK, (board >> 32) & ROW_MASK, board >> 48,
+        cols & ROW_MASK, (cols >> 16) & ROW_MASK, (cols >> 32) & ROW_MASK, cols >> 48,
+    )
+
+
+def monotonic_features(board):
+    """
+    Features used by GreedyAgent and ExpectimaxAgent: max tile, empty cells,
+    merge potential (adjacent equal pairs) and monotonicity (rows decreasing
+    left-to-right plus columns decreasing top-to-bottom).
+    """
+    r0, r1, r2, r3, c0, c1, c2, c3 = _lines(board)
+    return {
+        'position': exponent_to_tile(max(ROW_MAX[r0], ROW_MAX[r1], ROW_MAX[r2], ROW_MAX[r3])),
+        'empty': LINE_EMPTY[r0] + LINE_EMPTY[r1] + LINE_EMPTY[r2] + LINE_EMPTY[r3],
+        'merge': (LINE_MERGE[r0] + LINE_MERGE[r1] + LINE_MERGE[r2] + LINE_MERGE[r3]
+                  + LINE_MERGE[c0] + LINE_MERGE[c1] + LINE_MERGE[c2] + LINE_MERGE[c3]),
+        'monotonicity': (LINE_MONO[r0] + LINE_MONO[r1] + LINE_MONO[r2] + LINE_MONO[r3]
+                         + LINE_MONO[c0] + LINE_MONO[c1] + LINE_MONO[c2] + LINE_MONO[c3]),
+    }
+
+
+def snake_features(board):
+    """
+    Features used by SnakeExpectimaxAgent: snake gradient, empty cells,
+    max-tile-in-corner flag and merge potential.
+
+    The snake visits row 0 left-to-right, row 1 right-to-left, and so on; the
+    cell at snake index k is weighted 16 - k, so row i contributes
+    (16 - 4i) * (log sum) - (log sum weighted by position along the snake).
+    """
+    r0, r1, r2, r3, c0, c1, c2, c3 = _lines(board)
+    max_exp = max(ROW_MAX[r0], ROW_MAX[r1], ROW_MAX[r2], ROW_MAX[r3])
+    corner = 1 if max_exp in (r0 & 0xF, r0 >> 12, r3 & 0xF, r3 >> 12) else 0
+    gradient = (
+        16 * LINE_LOG_SUM[r0] - LINE_SNAKE_LTR[r0]
+        + 12 * LINE_LOG_SUM[r1] - LINE_SNAKE_RTL[r1]
+        + 8 * LINE_LOG_SUM[r2] - LINE_SNAKE_LTR[r2]
+        + 4 * LINE_LOG_SUM[r3] - LINE_SNAKE_RTL[r3]
+    )
+    return {
+        'gradient': float(gradient),
+        'empty': LINE_EMPTY[r0] + LINE_EMPTY[r1] + LINE_EMPTY[r2] + LINE_EMPTY[r3],
+        'corner': corner,
+        'merge': (LINE_MERGE[r0] + LINE_MERGE[r1] + LINE_MERGE[r2] + LINE_MERGE[r3]
+                  + LINE_MERGE[c0] + LINE_MERGE[c1] + LINE_MERGE[c2] + LINE_MERGE[c3]),
+    }
@@ -0,0 +1,121 @@
+"""
+N-tuple network value function over packed bitboards.
+
+The network has 17 tuples of four cells: the four rows, the four columns and
+the nine 2x2 squares. Each tuple reads its cells as a 16-bit index into its
+own table of 65,536 weights, and a board's value is the sum of the 17 weights
+it selects. Rows index their table with the packed row itself, columns with
+the rows of the transpose, and squares with two neighbouring bytes of
+adjacent rows, so evaluation is 17 shifts, masks and lookups.
+
+Values estimate the score still to come from an afterstate (the board after
+a move, before the spawn), learned by TD(0) as in Szubert & Jaskowski,
+"Temporal difference learning of n-tuple networks for the game 2048".
+
+All weights live in one flat float32 array. Saved networks are a 16-byte
+header followed by the raw little-endian floats; load() memory-maps the file
+read-only, so it opens in milliseconds and every process that loads it
+shares the same pages.
+"""
+import mmap
+import struct
+from array import array
+
+import bitboard
+from bitboard import MOVES, ROW_MASK, transpose
+
+MAGIC = b"NTW1"
+_HEADER = struct.Struct("<4sIII")  # magic, tuples, table size, reserved
+TABLE_SIZE = 1 << 16
+
+# Shift of the packed board that brings a 2x2 square's top-left cell to bit 0
+_SQUARE_SHIFTS = [16 * r + 4 * c for r in range(3) for c in range(3)]
+TUPLES = 8 + len(_SQUARE_SHIFTS)
+
+
+def tuple_indices(board):
+    """Flat weight index of each tuple for a packed board."""
+    cols = transpose(board)
+    indices = [
+        board & ROW_MASK,
+        TABLE_SIZE + ((board >> 16) & ROW_MASK),
+        2 * TABLE_SIZE + ((board >> 32) & ROW_MASK),
+        3 * TABLE_SIZE + (board >> 48),
+        4 * TABLE_SIZE + (cols & ROW_MASK),
+        5 * TABLE_SIZE + ((cols >> 16) & ROW_MASK),
+        6 * TABLE_SIZE + ((cols >> 32) & ROW_MASK),
+        7 * TABLE_SIZE + (cols >> 48),
+    ]
+    offset = 8 * TABLE_SIZE
+    for shift in _SQUARE_SHIFTS:
+        x = board >> shift
+        indices.append(offset + ((x & 0xFF) | ((x >> 8) & 0xFF00)))
+        offset += TABLE_SIZE
+    return indices
+
+
+class NTupleNetwork:
+    def __init__(self, weights=None):
+        # array('f') when trainable, a read-only memoryview when memory-mapped
+        self.weights = weights if weights is not None else array('f', bytes(4 * TUPLES * TABLE_SIZE))
+        self._map = None
+        self.path = None  # set when memory-mapped
+
+    def __reduce__(self):
+        # A mapped network pickles as its path, so worker processes map the same file
+        if self.path is not None:
+            return type(self).load, (self.path,)
+        return type(self), (self.weights,)
+
+    def value(self, board):
+        """Estimated score still to come from an afterstate."""
+        w = self.weights
+        return sum(w[i] for i in tuple_indices(board))
+
+    def best_move(self, board):
+        """Returns (move, afterstate, reward, reward + value) of the best move, or None if none is valid."""
+        best = None
+        for move in MOVES:
+            after, reward = bitboard.move(board, move)
+            if after == board:
+                continue
+            total = reward + self.value(after)
+            if best is None or total > best[3]:
+                best = (move, after, reward, total)
+        return best
+
+    def state_value(self, board):
+        """Value of a board about to move: best reward plus afterstate value, 0 when no move is left."""
+        best = self.best_move(board)
+        return best[3] if best is not None else 0.0
+
+    def update(self, board, delta):
+        """Adds delta to each weight the board selects (callers pass alpha * TD error)."""
+        w = self.weights
+        for i in tuple_indices(board):
+            w[i] += delta
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, TUPLES, TABLE_SIZE, 0))
+            f.write(self.weights.tobytes())
+
+    @classmethod
+    def load(cls, path, writable=False):
+        """
+        Memory-maps a saved network read-only; writable=True copies the weights
+        into an array('f') instead (for further training).
+        """
+        with open(path, "rb") as f:
+            magic, tuples, table_size, _ = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC or tuples != TUPLES or table_size != TABLE_SIZE:
+                raise ValueError(f"{path} is not an n-tuple network of this layout")
+            if writable:
+                weights = array('f')
+                weights.fromfile(f, TUPLES * TABLE_SIZE)
+                return cls(weights)
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        network = cls(memoryview(mapped)[_HEADER.size:].cast('f'))
+        network._map = mapped
+        network.path = path
+        return network
@@ -0,0 +1,76 @@
+import copy
+from concurrent.futures import ProcessPoolExecutor
+
+from ai_algs.transposition import TranspositionTable
+
+# Agent replica living in each worker process, set by _init_worker
+_agent = None
+
+
+def _init_worker(agent):
+    global _agent
+    _agent = agent
+
+
+def _expectimax(state, depth, chance, prob):
+    return _agent._expectimax(state, depth, chance, prob)
+
+
+class SearchPool:
+    """
+    Persistent process pool that evaluates the subtrees under an Expectimax
+    root in parallel. Each worker holds a serial copy of the agent (with its
+    own transposition table) for the lifetime of the pool.
+
+    split="root" sends one job per root move; split="chance" sends one job per
+    (move, empty cell, tile) grandchild, which keeps many cores busy even
+    with only two or three legal moves. Chance values are summed in the same
+    order as the serial search, so both modes pick exactly the same move.
+    """
+    def __init__(self, agent, workers, split="chance"):
+        if split not in ("root", "chance"):
+            raise ValueError(f"unknown split: {split!r}")
+        replica = copy.copy(agent)
+        replica.workers = 0
+        replica._pool = None
+        if agent.cache is not None:
+            replica.cache = TranspositionTable(agent.cache.max_entries)
+        self.agent = agent
+        self.split = split
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(replica,))
+
+    def evaluate(self, children, depth):
+        """Returns agent._expectimax(child, depth, True) for every root child."""
+        if self.split == "root":
+            n = len(children)
+            return list(self.executor.map(_expectimax, children, [depth] * n, [True] * n, [1.0] * n))
+
+        results = [None] * len(children)
+        jobs = []  # (child index, tile probability, cells expanded, grandchild)
+        for i, child in enumerate(children):
+            spawns = [] if depth == 0 or self.agent._is_game_over(child) else self.agent._chance_children(child, depth)
+            if not spawns:
+                results[i] = self.agent._expectimax(child, depth, True)
+                continue
+            self.agent.nodes['chance'] += 1
+            jobs.extend((i,) + spawn for spawn in spawns)
+        n = len(jobs)
+        values = self.executor.map(
+            _expectimax,
+            [job[3] for job in jobs],
+            [depth - 1] * n,
+            [False] * n,
+            [tile_prob / count for _, tile_prob, count, _ in jobs],
+            chunksize=max(1, n // (4 * self.workers)),
+        )
+        totals = {}
+        for (i, tile_prob, count, _), (val, _) in zip(jobs, values):
+            # Same accumulation as the chance branch of the serial search
+            totals[i] = totals.get(i, 0.0) + (tile_prob * val) / count
+        for i, total in totals.items():
+            results[i] = (total, self.agent._compute_features(children[i]))
+        return results
+
+    def close(self):
+        self.executor.shutdown()
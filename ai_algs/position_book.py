@@ -0,0 +1,71 @@
+"""
+On-disk book of precomputed best moves for frequently seen positions.
+
+A book file is a 16-byte header (magic, entry count, symmetry group) followed
+by the entries' canonical boards as sorted little-endian u64s and then one
+byte per entry: the index in bitboard.MOVES of the best move on the canonical
+board. load() memory-maps the file and looks boards up by bisection, so
+opening a book costs nothing however large it is.
+
+Boards are canonicalized under the symmetry group of the agent the book was
+built for (see symmetry.py), so one entry covers every equivalent board and
+the stored move is mapped back onto the board actually played.
+Books are written by build_book.py.
+"""
+import bisect
+import mmap
+import struct
+
+import symmetry
+from bitboard import MOVES
+
+MAGIC = b"2048BOOK"
+_HEADER = struct.Struct("<8sIB3x")
+_GROUPS = {len(group): group for group in (symmetry.IDENTITY, symmetry.DIAGONAL, symmetry.FULL)}
+
+
+def write_book(path, entries, group):
+    """Writes {canonical board: canonical move} as a book file."""
+    keys = sorted(entries)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(keys), len(group)))
+        f.write(struct.pack(f"<{len(keys)}Q", *keys))
+        f.write(bytes(MOVES.index(entries[key]) for key in keys))
+
+
+class PositionBook:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, group_size = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a position book")
+        self.group = _GROUPS[group_size]
+        start = _HEADER.size
+        self._keys = memoryview(self._map)[start:start + 8 * count].cast('Q')
+        self._moves = memoryview(self._map)[start + 8 * count:start + 9 * count]
+        self.hits = 0
+        self.misses = 0
+
+    def __reduce__(self):
+        # Worker processes map the same file rather than receiving a copy
+        return type(self), (self.path,)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def lookup(self, board):
+        """Returns the book move for the board, or None if the position is not in the book."""
+        key, index = symmetry.canonicalize(board, self.group)
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            self.hits += 1
+            return symmetry.from_canonical_move(MOVES[self._moves[i]], index)
+        self.misses += 1
+        return None
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,104 @@
+"""
+Per-move search profiling.
+
+MoveProfiler wraps any agent and records what each get_action call cost.
+Agents are never wrapped unless profiling is asked for, so disabled profiling
+costs nothing; enabled, it reads the counters search agents already keep
+(nodes, cache, last_depth, last_iterations) once before and once after a move.
+"""
+import time
+
+
+class MoveProfiler:
+    """
+    Agent wrapper that records one dict per move:
+      wall_ms          time spent in get_action
+      max/chance/leaf  nodes expanded by this process (workers' nodes are not seen)
+      nodes_per_sec    expanded nodes over wall time
+      branching        children evaluated (expansions plus cache hits) per interior node,
+                       counting the root of each search as interior
+      depth            depth searched (deepest completed iteration when timed)
+      iteration_ms     time of each completed iterative-deepening iteration
+      cache_hits/cache_misses/cache_hit_rate  transposition-table lookups of this move
+    Agents without a search report only wall_ms.
+    """
+    def __init__(self, agent):
+        self.agent = agent
+        self.records = []
+
+    def get_action(self, game):
+        agent = self.agent
+        nodes = getattr(agent, 'nodes', None)
+        cache = getattr(agent, 'cache', None)
+        nodes_before = dict(nodes) if nodes is not None else None
+        cache_before = (cache.hits, cache.misses) if cache is not None else None
+
+        start = time.perf_counter()
+        result = agent.get_action(game)
+        elapsed = time.perf_counter() - start
+
+        record = {'move': len(self.records), 'wall_ms': elapsed * 1000}
+        if nodes_before is not None:
+            counts = {kind: nodes[kind] - nodes_before.get(kind, 0) for kind in nodes}
+            record.update(counts)
+            expanded = sum(counts.values())
+            interior = counts.get('max', 0) + counts.get('chance', 0)
+            hits = 0
+            if cache_before is not None:
+                hits = cache.hits - cache_before[0]
+                misses = cache.misses - cache_before[1]
+                lookups = hits + misses
+                record.update(cache_hits=hits, cache_misses=misses,
+                              cache_hit_rate=hits / lookups if lookups else 0.0)
+            record['nodes_per_sec'] = expanded / elapsed if elapsed > 0 else 0.0
+        if hasattr(agent, 'last_depth'):
+            record['depth'] = agent.last_depth
+        iterations = getattr(agent, 'last_iterations', None)
+        if iterations:
+            record['iteration_ms'] = [ms for _, ms in iterations]
+        if nodes_before is not None:
+            # Every evaluated node is a child of one interior node or of a search root
+            parents = interior + _roots(record)
+            record['branching'] = (expanded + hits) / parents if parents else 0.0
+        self.records.append(record)
+        return result
+
+    def drain(self):
+        """Returns the records gathered so far and starts a new list (e.g. per game)."""
+        records, self.records = self.records, []
+        return records
+
+
+def _roots(record):
+    """Searches run for a move: one per timed iteration, none when the move came from a book."""
+    if 'iteration_ms' in record:
+        return len(record['iteration_ms'])
+    return 1 if record.get('depth', 1) else 0
+
+
+def summarize_profile(records):
+    """Prints an aggregate table of move records, one row per search depth plus a total."""
+    if not records:
+        return
+    groups = {}
+    for record in records:
+        groups.setdefault(record.get('depth', '-'), []).append(record)
+    rows = sorted(groups.items(), key=lambda item: (item[0] == '-', item[0] if item[0] != '-' else 0))
+    rows.append(('all', records))
+
+    print("\nProfile per move:")
+    print(f"  {'depth':>5} {'moves':>7} {'mean ms':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'nodes':>9} {'nodes/s':>10} {'branch':>7} {'hit rate':>9}")
+    for depth, group in rows:
+        times = sorted(r['wall_ms'] for r in group)
+        n = len(group)
+        nodes = sum(r.get('max', 0) + r.get('chance', 0) + r.get('leaf', 0) for r in group)
+        seconds = sum(times) / 1000
+        parents = sum(r.get('max', 0) + r.get('chance', 0) + _roots(r) for r in group)
+        hits = sum(r.get('cache_hits', 0) for r in group)
+        lookups = hits + sum(r.get('cache_misses', 0) for r in group)
+        print(f"  {depth!s:>5} {n:>7,} {seconds * 1000 / n:>9.2f} {times[n // 2]:>8.2f} "
+              f"{times[min(n - 1, n * 99 // 100)]:>8.2f} {nodes / n:>9,.0f} "
+              f"{nodes / seconds if seconds else 0:>10,.0f} "
+              f"{(nodes + hits) / parents if parents else 0:>7.2f} "
+              f"{hits / lookups if lookups else 0:>9.1%}")
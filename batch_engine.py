@@ -0,0 +1,147 @@
+"""
+Vectorized NumPy engine that plays many games in lockstep.
+
+Boards use the packed layout from bitboard.py, one uint64 per game, and moves
+are the same row-table lookups done with fancy indexing over the whole batch.
+Finished games are retired as they go, so each step only touches live boards.
+
+Agents drive a batch through get_batch_actions(candidates, valid), where
+candidates[i, m] is game i's board after move m (in bitboard.MOVES order) and
+valid[i, m] says whether that move changes the board. It returns one move
+index per game.
+"""
+import random
+
+import numpy as np
+
+import bitboard
+
+_ROW_LEFT = np.array(bitboard.ROW_LEFT, dtype=np.uint64)
+_ROW_RIGHT = np.array(bitboard.ROW_RIGHT, dtype=np.uint64)
+_SCORE_LEFT = np.array(bitboard.SCORE_LEFT, dtype=np.int64)
+_SCORE_RIGHT = np.array(bitboard.SCORE_RIGHT, dtype=np.int64)
+
+_ROW_MASK = np.uint64(0xFFFF)
+_CELL_MASK = np.uint64(0xF)
+_ROW_SHIFTS = np.array([0, 16, 32, 48], dtype=np.uint64)
+_CELL_SHIFTS = np.arange(0, 64, 4, dtype=np.uint64)
+
+
+def transpose(boards):
+    """Vectorized bitboard.transpose."""
+    a1 = boards & np.uint64(0xF0F00F0FF0F00F0F)
+    a2 = boards & np.uint64(0x0000F0F00000F0F0)
+    a3 = boards & np.uint64(0x0F0F00000F0F0000)
+    a = a1 | (a2 << np.uint64(12)) | (a3 >> np.uint64(12))
+    b1 = a & np.uint64(0xFF00FF0000FF00FF)
+    b2 = a & np.uint64(0x00FF00FF00000000)
+    b3 = a & np.uint64(0x00000000FF00FF00)
+    return b1 | (b2 >> np.uint64(24)) | (b3 << np.uint64(24))
+
+
+def _move_rows(boards, table, scores):
+    rows = (boards[:, None] >> _ROW_SHIFTS) & _ROW_MASK
+    moved = table[rows] << _ROW_SHIFTS
+    return np.bitwise_or.reduce(moved, axis=1), scores[rows].sum(axis=1)
+
+
+def move_all(boards):
+    """
+    Returns (candidates, gains): the (N, 4) boards after each move in
+    bitboard.MOVES order and the score each move gains.
+    """
+    columns = transpose(boards)
+    up, up_gain = _move_rows(columns, _ROW_LEFT, _SCORE_LEFT)
+    down, down_gain = _move_rows(columns, _ROW_RIGHT, _SCORE_RIGHT)
+    left, left_gain = _move_rows(boards, _ROW_LEFT, _SCORE_LEFT)
+    right, right_gain = _move_rows(boards, _ROW_RIGHT, _SCORE_RIGHT)
+    candidates = np.stack([transpose(up), transpose(down), left, right], axis=1)
+    gains = np.stack([up_gain, down_gain, left_gain, right_gain], axis=1)
+    return candidates, gains
+
+
+def cell_exponents(boards):
+    """Returns the (N, 16) log2 exponents of every cell in row-major order."""
+    return ((boards[:, None] >> _CELL_SHIFTS) & _CELL_MASK).astype(np.int64)
+
+
+def cell_values(boards):
+    """Returns the (N, 4, 4) tile values of every board."""
+    exps = cell_exponents(boards)
+    return np.where(exps > 0, np.left_shift(1, exps), 0).reshape(-1, 4, 4)
+
+
+def spawn_tiles(boards, rng):
+    """Places a 2 (p=0.9) or 4 (p=0.1) on a random empty cell of every board that has one."""
+    empty = cell_exponents(boards) == 0
+    counts = empty.sum(axis=1)
+    has_room = counts > 0
+    pick = (rng.random(len(boards)) * counts).astype(np.int64)
+    # Position of the pick-th empty cell in each row of the mask
+    target = (np.cumsum(empty, axis=1) == (pick + 1)[:, None]) & empty
+    cell = target.argmax(axis=1).astype(np.uint64)
+    exponent = np.where(rng.random(len(boards)) < 0.9, 1, 2).astype(np.uint64)
+    spawned = boards | (exponent << (cell * np.uint64(4)))
+    return np.where(has_room, spawned, boards)
+
+
+class BatchGames:
+    """
+    N independent games held as packed uint64 boards. Each step() applies
+    one move per live game, spawns tiles where the board changed and retires
+    games that have no valid move left.
+    """
+    def __init__(self, n, seed=None):
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        boards = np.zeros(n, dtype=np.uint64)
+        self._start(spawn_tiles(spawn_tiles(boards, self.rng), self.rng))
+
+    @classmethod
+    def from_boards(cls, boards, rng):
+        """Continues games from the given packed boards (spawns already placed), drawing tiles from rng."""
+        games = cls.__new__(cls)
+        games.rng = rng
+        games._start(np.asarray(boards, dtype=np.uint64).copy())
+        return games
+
+    def _start(self, boards):
+        self.boards = boards
+        self.scores = np.zeros(len(boards), dtype=np.int64)
+        self.moves = np.zeros(len(boards), dtype=np.int64)
+        self.live = np.arange(len(boards))
+        self._refresh()
+
+    def _refresh(self):
+        """Recomputes candidate moves for the live games and retires finished ones."""
+        candidates, gains = move_all(self.boards[self.live])
+        valid = candidates != self.boards[self.live][:, None]
+        alive = valid.any(axis=1)
+        self.live = self.live[alive]
+        self.candidates = candidates[alive]
+        self.gains = gains[alive]
+        self.valid = valid[alive]
+
+    @property
+    def done(self):
+        return len(self.live) == 0
+
+    def step(self, actions):
+        """Applies one move index per live game (aligned with self.live)."""
+        rows = np.arange(len(self.live))
+        new_boards = self.candidates[rows, actions]
+        moved = self.valid[rows, actions]
+        spawned = spawn_tiles(new_boards[moved], self.rng)
+        new_boards[moved] = spawned
+        self.boards[self.live] = new_boards
+        self.scores[self.live] += self.gains[rows, actions]
+        self.moves[self.live] += 1
+        self._refresh()
+
+    def run(self, agent):
+        """Plays every game to the end with agent.get_batch_actions."""
+        while not self.done:
+            self.step(agent.get_batch_actions(self.candidates, self.valid))
+        return self.scores, self.max_tiles()
+
+    def max_tiles(self):
+        return cell_values(self.boards).reshape(len(self.boards), -1).max(axis=1)
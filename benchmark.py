@@ -2,23 +2,142 @@
 import argparse
 import importlib
 import inspect
-from game_2048 import Game2048
+import json
+import math
+import multiprocessing
+import random
+import statistics
+from game_engine import Game2048, BitboardGame2048
+from ai_algs.profiling import MoveProfiler, summarize_profile
+from game_record import RecordWriter, encode_step
 
-def play_one(agent):
-    game = Game2048(mode="ai", algorithm=agent.get_action)
+def play_one(agent, game_cls=Game2048, record=None, size=4):
+    """
+    Plays one game on a size x size board and returns (score, max tile). If record is a
+    dict it receives the initial packed 'board' and the game's 'steps' encoded for game_record.
+    """
+    game = game_cls(mode="ai", algorithm=agent.get_action, size=size)
+    if record is not None:
+        record['board'] = game.get_state().board
+        steps = record['steps'] = bytearray()
     while not game.is_game_over():
         move, *_ = agent.get_action(game)
         game.move_board(move)
-        game.spawn_tile()
+        spawn = game.spawn_tile()
+        if record is not None:
+            steps.append(encode_step(move, spawn))
     return game.score, game.get_max_tile()
 
+def make_agent(name, **options):
+    """
+    Imports ai_algs.<name>_ai and builds <name>Agent, passing only the options
+    its constructor accepts (e.g. depth is ignored by RandomAgent). Constructors
+    that forward **kwargs to a base class accept the base class's options too.
+    """
+    mod = importlib.import_module(f"ai_algs.{name}_ai")
+    AgentClass = getattr(mod, f"{name}Agent")
+    params = set()
+    for cls in AgentClass.__mro__:
+        if '__init__' in vars(cls):
+            params.update(inspect.signature(cls.__init__).parameters)
+    return AgentClass(**{k: v for k, v in options.items() if k in params})
+
+# Per-process agent and engine, set up once by _init_worker
+_worker = {}
+
+def _init_worker(agent_name, options, bitboard, profile=False, record=False, size=4):
+    _worker['agent'] = make_agent(agent_name, **options)
+    _worker['game_cls'] = BitboardGame2048 if bitboard else Game2048
+    _worker['size'] = size
+    # Only a profiled run pays for the wrapper
+    _worker['profiler'] = MoveProfiler(_worker['agent']) if profile else None
+    _worker['record'] = record
+
+def search_counters(agent):
+    """The agent's running transposition table, book and pruning counters, by name."""
+    counters = {}
+    cache = getattr(agent, 'cache', None)
+    if cache is not None:
+        counters.update(cache_hits=cache.hits, cache_misses=cache.misses)
+    book = getattr(agent, 'book', None)
+    if book is not None:
+        counters.update(book_hits=book.hits, book_misses=book.misses)
+    if getattr(agent, 'pruning', False):
+        counters.update(spawns_searched=agent.prune_counts['searched'], spawns_pruned=agent.prune_counts['pruned'])
+    return counters
+
+def _play_seeded(job):
+    index, seed = job
+    random.seed(seed)
+    agent = _worker['agent']
+    profiler = _worker['profiler']
+    before = dict(getattr(agent, 'nodes', {}))
+    counters_before = search_counters(agent)
+    record = {} if _worker['record'] else None
+    score, max_tile = play_one(profiler or agent, _worker['game_cls'], record, _worker['size'])
+    nodes = {k: v - before[k] for k, v in getattr(agent, 'nodes', {}).items()}
+    # A new board size replaces the cache, whose counters then start from zero
+    counters = {k: v - counters_before.get(k, 0) for k, v in search_counters(agent).items()}
+    moves = profiler.drain() if profiler else []
+    for move in moves:
+        move['game'] = index
+        move['seed'] = seed
+    return index, seed, score, max_tile, nodes, counters, moves, record
+
+def game_seeds(master_seed, n):
+    """Derives one deterministic seed per game from the master seed."""
+    rng = random.Random(master_seed)
+    return [rng.getrandbits(64) for _ in range(n)]
+
+def run_games(agent_name, options, seeds, workers=1, bitboard=False, profile=False, record=False, size=4):
+    """
+    Plays one game per seed and yields (index, seed, score, max_tile, nodes, counters, moves,
+    record) as games finish; counters holds the game's search_counters, moves holds the per-move profile records when profile is set and
+    record the initial board and encoded steps (see play_one) when record is set.
+    With workers > 1 games run on a process pool, so results arrive out of
+    order; each game only depends on its own seed.
+    """
+    jobs = list(enumerate(seeds, 1))
+    if workers <= 1:
+        _init_worker(agent_name, options, bitboard, profile, record, size)
+        yield from map(_play_seeded, jobs)
+        return
+    with multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(agent_name, options, bitboard, profile, record, size)) as pool:
+        yield from pool.imap_unordered(_play_seeded, jobs)
+
+def percentile(values, p):
+    """Linear-interpolated percentile (p in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * p / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+def summarize(scores, tiles):
+    n = len(scores)
+    print("\nSummary over", n, "games:")
+    print(f"  • Average score    = {statistics.mean(scores):,.1f}")
+    print(f"  • Average max tile = {statistics.mean(tiles):.1f}")
+    for name, values in (("score", scores), ("max tile", tiles)):
+        std = statistics.stdev(values) if n > 1 else 0.0
+        p10, p50, p90, p99 = (percentile(values, p) for p in (10, 50, 90, 99))
+        print(f"  • {name:<8}  mean {statistics.mean(values):10,.1f}  std {std:10,.1f}  "
+              f"p10 {p10:10,.1f}  p50 {p50:10,.1f}  p90 {p90:10,.1f}  p99 {p99:10,.1f}")
+    print("  • Tile reached (% of games):")
+    tile = min(tiles)
+    while tile <= max(tiles):
+        reached = sum(1 for t in tiles if t >= tile)
+        print(f"      {tile:6d}  {100 * reached / n:6.1f}%")
+        tile *= 2
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Run 2048 with a chosen AI agent (no graphics)."
     )
     parser.add_argument(
         "--agent", 
-        choices=["Random", "Greedy", "Expectimax", "SnakeExpectimax"], 
+        choices=["Random", "Greedy", "Expectimax", "SnakeExpectimax", "NTuple", "MonteCarlo"], 
         default="Expectimax",
         help="Which agent to use"
     )
@@ -34,29 +153,223 @@ if __name__ == "__main__":
         default=10,
         help="How many full games to simulate"
     )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=100_000,
+        help="Transposition table entries for search agents (0 disables caching)"
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=4,
+        help="Play on size x size boards (NTuple, MonteCarlo, --batch, --record, "
+             "--evaluator and --book are 4x4 only)"
+    )
+    parser.add_argument(
+        "--bitboard",
+        action="store_true",
+        help="Run games on the packed bitboard engine"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Spread games across this many processes"
+    )
+    parser.add_argument(
+        "--search-workers",
+        type=int,
+        default=0,
+        help="Evaluate each move's root subtrees on this many processes (Expectimax agents)"
+    )
+    parser.add_argument(
+        "--min-prob",
+        type=float,
+        default=0.0,
+        help="Score search paths as leaves once their probability drops below this"
+    )
+    parser.add_argument(
+        "--chance-samples",
+        type=int,
+        default=None,
+        help="Expand at most this many random empty cells per chance node"
+    )
+    parser.add_argument(
+        "--four-spawn-plies",
+        type=int,
+        default=None,
+        help="Only expand 4-tile spawns this many plies below the root"
+    )
+    parser.add_argument(
+        "--time-limit-ms",
+        type=float,
+        default=None,
+        help="Per-move time budget; search agents deepen iteratively within it (--depth is the base cap)"
+    )
+    parser.add_argument(
+        "--batched",
+        action="store_true",
+        help="Expand Expectimax a ply at a time over NumPy arrays instead of recursively"
+    )
+    parser.add_argument(
+        "--pruning",
+        action="store_true",
+        help="Cut Expectimax chance nodes off once they cannot change the move (Star1)"
+    )
+    parser.add_argument(
+        "--move-ordering",
+        choices=["heuristic", "history"],
+        default=None,
+        help="Order Expectimax moves for --pruning: by afterstate heuristic or previous best move"
+    )
+    parser.add_argument(
+        "--weights",
+        default=None,
+        help="N-tuple weights file for --agent NTuple (default: ntuple_weights.bin)"
+    )
+    parser.add_argument(
+        "--evaluator",
+        metavar="WEIGHTS",
+        default=None,
+        help="Score Expectimax leaves with this n-tuple network instead of the heuristic"
+    )
+    parser.add_argument(
+        "--book",
+        default=None,
+        help="Position book (see build_book.py) the Expectimax agents consult before searching"
+    )
+    parser.add_argument(
+        "--playouts",
+        type=int,
+        default=100,
+        help="MonteCarlo playouts per valid move (per batch when --time-limit-ms is set)"
+    )
+    parser.add_argument(
+        "--policy",
+        choices=["random", "greedy"],
+        default="random",
+        help="MonteCarlo playout policy"
+    )
+    parser.add_argument(
+        "--max-moves",
+        type=int,
+        default=None,
+        help="Cut MonteCarlo playouts off after this many moves"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Master seed; every game gets its own seed derived from it"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Play all games in lockstep on the NumPy batch engine (agent needs get_batch_actions)"
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        default=None,
+        help="Write one JSON line per move (time, nodes, branching, depth, cache hits) to PATH "
+             "and print an aggregate table"
+    )
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        default=None,
+        help="Append every game (seed, initial board, moves and spawns) to a game_record file"
+    )
     args = parser.parse_args()
+    if args.batch and (args.profile or args.record):
+        parser.error("--profile and --record follow single games and do not apply to --batch")
+    if args.workers > 1 and args.search_workers > 1:
+        # Game workers are daemonic processes, which may not start a search pool of their own
+        parser.error("--workers and --search-workers cannot both be above 1; parallelize games or search")
+    if args.batch and args.book:
+        parser.error("--batch games only see the moves' children, so they cannot consult a --book")
+    if args.size != 4 and (args.batch or args.record or args.evaluator or args.book
+                           or args.agent in ("NTuple", "MonteCarlo")):
+        parser.error(f"--size {args.size} is not supported with the 4x4-only options and agents")
+    if args.size < 2:
+        parser.error("--size must be at least 2")
 
-    # Dynamically import your agent class
-    mod = importlib.import_module(f"ai_algs.{args.agent}_ai")
-    AgentClass = getattr(mod, f"{args.agent}Agent")
-
-    # Inspect __init__ to see if it accepts a depth parameter
-    sig = inspect.signature(AgentClass.__init__)
-    if "depth" in sig.parameters:
-        agent = AgentClass(depth=args.depth)
-    else:
-        agent = AgentClass()
+    master_seed = args.seed if args.seed is not None else random.randrange(2**32)
+    print(f"Master seed: {master_seed}")
+    options = dict(depth=args.depth, cache_size=args.cache_size, workers=args.search_workers,
+                   min_prob=args.min_prob, chance_samples=args.chance_samples,
+                   four_spawn_plies=args.four_spawn_plies, time_limit_ms=args.time_limit_ms,
+                   playouts=args.playouts, policy=args.policy, max_moves=args.max_moves,
+                   batched=args.batched, pruning=args.pruning, move_ordering=args.move_ordering)
+    if args.weights:
+        options['weights_path'] = args.weights
+    if args.evaluator:
+        from ai_algs.ntuple import NTupleNetwork
+        options['evaluator'] = NTupleNetwork.load(args.evaluator)
+    if args.book:
+        from ai_algs.position_book import PositionBook
+        options['book'] = PositionBook(args.book)
 
     scores = []
     tiles = []
-    for i in range(1, args.games + 1):
-        score, max_tile = play_one(agent)
-        scores.append(score)
-        tiles.append(max_tile)
-        print(f"Game {i:2d}: score = {score:6d}   max tile = {max_tile}")
-
-    avg_score = sum(scores) / len(scores)
-    avg_tile  = sum(tiles)  / len(tiles)
-    print("\nSummary over", args.games, "games:")
-    print(f"  • Average score    = {avg_score:,.1f}")
-    print(f"  • Average max tile = {avg_tile:.1f}")
\ No newline at end of file
+    nodes = {}
+    # Summed over games, so they cover every worker process
+    counters = {}
+    if args.batch:
+        agent = make_agent(args.agent, **options)
+        if not hasattr(agent, "get_batch_actions"):
+            parser.error(f"{args.agent}Agent does not support --batch")
+        from batch_engine import BatchGames
+        random.seed(master_seed)
+        batch_scores, batch_tiles = BatchGames(args.games, seed=master_seed).run(agent)
+        counters = search_counters(agent)
+        scores = [int(s) for s in batch_scores]
+        tiles = [int(t) for t in batch_tiles]
+        for i, (score, max_tile) in enumerate(zip(scores, tiles), 1):
+            print(f"Game {i:2d}: score = {score:6d}   max tile = {max_tile}")
+    else:
+        seeds = game_seeds(master_seed, args.games)
+        profile_out = open(args.profile, "w") if args.profile else None
+        profile = []
+        # Games are appended as they finish, by this process only
+        recorder = RecordWriter(args.record) if args.record else None
+        for i, seed, score, max_tile, game_nodes, game_counters, moves, record in run_games(
+                args.agent, options, seeds, args.workers, args.bitboard,
+                profile_out is not None, recorder is not None, args.size):
+            if profile_out is not None:
+                profile.extend(moves)
+                profile_out.writelines(json.dumps(move) + "\n" for move in moves)
+            if recorder is not None:
+                recorder.write_game(seed, record['board'], record['steps'], score, max_tile)
+            scores.append(score)
+            tiles.append(max_tile)
+            for kind, count in game_nodes.items():
+                nodes[kind] = nodes.get(kind, 0) + count
+            for name, count in game_counters.items():
+                counters[name] = counters.get(name, 0) + count
+            print(f"Game {i:2d}: score = {score:6d}   max tile = {max_tile}   seed = {seed}")
+        if profile_out is not None:
+            profile_out.close()
+        if recorder is not None:
+            recorder.close()
+
+    summarize(scores, tiles)
+    if nodes:
+        counts = ", ".join(f"{kind} {count:,}" for kind, count in nodes.items())
+        print(f"  • Nodes expanded   = {sum(nodes.values()):,} ({counts}), "
+              f"{sum(nodes.values()) / len(scores):,.0f} per game")
+    # Batched search keeps no table, so there is nothing to report for --batch
+    if counters.get('cache_hits', 0) + counters.get('cache_misses', 0):
+        hits, misses = counters['cache_hits'], counters['cache_misses']
+        print(f"  • Cache hit rate   = {hits / max(1, hits + misses):.1%} ({hits:,} hits, {misses:,} misses)")
+    if 'spawns_pruned' in counters:
+        pruned, spawns = counters['spawns_pruned'], counters['spawns_pruned'] + counters['spawns_searched']
+        print(f"  • Spawns pruned    = {pruned / max(1, spawns):.1%} ({pruned:,} of {spawns:,})")
+    if 'book_hits' in counters:
+        hits, lookups = counters['book_hits'], counters['book_hits'] + counters['book_misses']
+        print(f"  • Book hit rate    = {hits / max(1, lookups):.1%} ({hits:,} of {lookups:,} moves, "
+              f"{len(options['book']):,} entries)")
+    if args.profile:
+        summarize_profile(profile)
+        print(f"  Per-move records written to {args.profile}")
\ No newline at end of file
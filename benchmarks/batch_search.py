@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Compares batched (level-synchronous) and recursive Expectimax on the micro
+benchmark corpus: both must pick the same move on every position, and the
+timings give the speedup per depth. Recursive search runs without a cache,
+the configuration batched search reproduces exactly.
+
+    python -m benchmarks.batch_search --agent Expectimax --depths 2 3 4
+
+Leaf throughput is the recursive search's leaf count divided by each
+search's time, so both rates measure the same tree.
+"""
+import argparse
+import importlib
+import sys
+import time
+
+import bitboard
+from game_state import GameState, StaticGame
+from benchmarks.micro import load_corpus
+
+
+def timed_moves(agent, positions):
+    moves = []
+    start = time.perf_counter()
+    for position in positions:
+        moves.append(agent.get_action(position)[0])
+    return moves, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched vs recursive Expectimax.")
+    parser.add_argument("--agent", choices=["Expectimax", "SnakeExpectimax"], default="Expectimax")
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 3, 4])
+    args = parser.parse_args()
+
+    AgentClass = getattr(importlib.import_module(f"ai_algs.{args.agent}_ai"), f"{args.agent}Agent")
+    positions = [StaticGame(GameState(bitboard.pack(entry["board"]), entry["score"])) for entry in load_corpus()]
+    print(f"{args.agent}, {len(positions)} positions")
+    print(f"{'depth':>5} {'recursive s':>12} {'batched s':>10} {'speedup':>8} "
+          f"{'recursive leaves/s':>19} {'batched leaves/s':>17} {'moves differ':>13}")
+    mismatches = 0
+    for depth in args.depths:
+        recursive = AgentClass(depth=depth, cache_size=0)
+        batched = AgentClass(depth=depth, batched=True)
+        batched.get_action(positions[0])  # first call imports NumPy and builds the tables
+        recursive_moves, recursive_time = timed_moves(recursive, positions)
+        batched_moves, batched_time = timed_moves(batched, positions)
+        differ = sum(a != b for a, b in zip(recursive_moves, batched_moves))
+        mismatches += differ
+        leaves = recursive.nodes['leaf']
+        print(f"{depth:5d} {recursive_time:12.2f} {batched_time:10.2f} {recursive_time / batched_time:7.1f}x "
+              f"{leaves / recursive_time:19,.0f} {leaves / batched_time:17,.0f} {differ:13d}", flush=True)
+    sys.exit(1 if mismatches else 0)
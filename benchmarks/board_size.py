@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Throughput of the game engines and Expectimax search by board size.
+
+Games per second are full RandomAgent games on the list and the packed
+engine; nodes per second are Expectimax nodes expanded over the first
+--moves moves of seeded games.
+
+    python -m benchmarks.board_size --sizes 4 5 6 --games 200 --depth 2
+"""
+import argparse
+import random
+import time
+
+from benchmark import play_one, game_seeds
+from game_engine import Game2048, BitboardGame2048
+from ai_algs.Random_ai import RandomAgent
+from ai_algs.Expectimax_ai import ExpectimaxAgent
+
+
+def games_per_second(game_cls, size, seeds):
+    agent = RandomAgent()
+    start = time.perf_counter()
+    for seed in seeds:
+        random.seed(seed)
+        play_one(agent, game_cls, size=size)
+    return len(seeds) / (time.perf_counter() - start)
+
+
+def search_rate(size, depth, moves, seeds):
+    """Returns (nodes per second, moves per second) of Expectimax over the first moves of each game."""
+    agent = ExpectimaxAgent(depth=depth)
+    played = 0
+    elapsed = 0.0
+    for seed in seeds:
+        random.seed(seed)
+        game = BitboardGame2048(mode="ai", size=size)
+        for _ in range(moves):
+            if game.is_game_over():
+                break
+            start = time.perf_counter()
+            move, *_ = agent.get_action(game)
+            elapsed += time.perf_counter() - start
+            game.move_board(move)
+            game.spawn_tile()
+            played += 1
+    return sum(agent.nodes.values()) / elapsed, played / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Engine and search throughput by board size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 5, 6])
+    parser.add_argument("--games", type=int, default=100, help="RandomAgent games per size and engine")
+    parser.add_argument("--depth", type=int, default=2, help="Expectimax search depth")
+    parser.add_argument("--search-games", type=int, default=3)
+    parser.add_argument("--moves", type=int, default=200, help="Moves searched per search game")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    seeds = game_seeds(args.seed, args.games)
+    search_seeds = game_seeds(args.seed, args.search_games)
+    print(f"{'size':>6} {'list games/s':>14} {'packed games/s':>16} {'nodes/s':>12} {'moves/s':>10}")
+    for size in args.sizes:
+        list_rate = games_per_second(Game2048, size, seeds)
+        packed_rate = games_per_second(BitboardGame2048, size, seeds)
+        nodes_rate, moves_rate = search_rate(size, args.depth, args.moves, search_seeds)
+        print(f"{size}x{size:<4} {list_rate:14.1f} {packed_rate:16.1f} {nodes_rate:12,.0f} {moves_rate:10.1f}",
+              flush=True)
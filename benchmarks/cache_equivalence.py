@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Checks that the transposition table never changes a move: plays seeded games
+with an uncached Expectimax agent and asks a cached agent, whose table
+persists across moves and games, for its move on every position and then on
+the position's transpose, which a table keyed on symmetric boards answers
+from the entries the position just filled. Cached
+entries are shared between symmetric boards, so this fails if their values
+differ in the last bit, or if the leaf values are not invariant under the
+symmetries the cache shares. Exits with status 1 on any differing move.
+
+    python -m benchmarks.cache_equivalence --agent Expectimax --depths 2 3 --seeds 0 1 2
+    python -m benchmarks.cache_equivalence --random-evaluator 7 --depths 2
+
+--evaluator scores leaves with a trained n-tuple network; --random-evaluator
+with one of seeded random weights, which needs no training but is just as
+asymmetric.
+"""
+import argparse
+import importlib
+import random
+import sys
+
+from bitboard import transpose
+from game_engine import BitboardGame2048
+from game_state import GameState, StaticGame
+
+
+def random_network(seed):
+    from array import array
+    from ai_algs.ntuple import NTupleNetwork, TUPLES, TABLE_SIZE
+
+    rng = random.Random(seed)
+    return NTupleNetwork(array('f', [rng.uniform(0, 100) for _ in range(TUPLES * TABLE_SIZE)]))
+
+
+def differing_moves(AgentClass, depth, seeds, evaluator=None):
+    """Returns (positions, [(seed, move number, uncached move, cached move), ...]); transposed positions are marked "T"."""
+    uncached = AgentClass(depth=depth, cache_size=0, evaluator=evaluator)
+    cached = AgentClass(depth=depth, evaluator=evaluator)
+    positions = 0
+    differ = []
+    for seed in seeds:
+        random.seed(seed)
+        game = BitboardGame2048(mode="ai")
+        number = 0
+        while not game.is_game_over():
+            move = uncached.get_action(game)[0]
+            cached_move = cached.get_action(game)[0]
+            if cached_move != move:
+                differ.append((seed, number, move, cached_move))
+            state = game.get_state()
+            mirrored = StaticGame(GameState(transpose(state.board), state.score))
+            mirrored_move, cached_mirrored_move = uncached.get_action(mirrored)[0], cached.get_action(mirrored)[0]
+            if cached_mirrored_move != mirrored_move:
+                differ.append((seed, f"{number}T", mirrored_move, cached_mirrored_move))
+            game.move_board(move)
+            game.spawn_tile()
+            positions += 1
+            number += 1
+    return positions, differ
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cached vs uncached Expectimax moves on seeded games.")
+    parser.add_argument("--agent", choices=["Expectimax", "SnakeExpectimax"], default="Expectimax")
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 3])
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2], help="One game per seed")
+    parser.add_argument("--evaluator", metavar="WEIGHTS", default=None,
+                        help="Score leaves with this n-tuple network instead of the heuristic")
+    parser.add_argument("--random-evaluator", metavar="SEED", type=int, default=None,
+                        help="Score leaves with an n-tuple network of random weights drawn from SEED")
+    args = parser.parse_args()
+
+    evaluator = None
+    if args.evaluator:
+        from ai_algs.ntuple import NTupleNetwork
+        evaluator = NTupleNetwork.load(args.evaluator)
+    elif args.random_evaluator is not None:
+        evaluator = random_network(args.random_evaluator)
+
+    AgentClass = getattr(importlib.import_module(f"ai_algs.{args.agent}_ai"), f"{args.agent}Agent")
+    mismatches = 0
+    for depth in args.depths:
+        positions, differ = differing_moves(AgentClass, depth, args.seeds, evaluator)
+        mismatches += len(differ)
+        print(f"{args.agent} depth {depth}: {positions:,} positions, {len(differ)} moves differ", flush=True)
+        for seed, number, move, cached_move in differ[:5]:
+            print(f"  seed {seed} move {number}: uncached {move}, cached {cached_move}")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Runs benchmark.py with combinations of its process and engine options and
+checks each either finishes or is rejected with a usage error, never a
+traceback. Exits with status 1 if any combination misbehaves.
+
+    python -m benchmarks.cli_options
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE = ["--agent", "Expectimax", "--games", "2", "--depth", "2", "--seed", "0"]
+
+# (extra arguments, whether benchmark.py should accept them); depth 2 so search
+# workers have chance nodes to take
+CASES = [
+    ([], True),
+    (["--workers", "2"], True),
+    (["--search-workers", "2"], True),
+    (["--workers", "2", "--search-workers", "2"], False),
+    (["--workers", "2", "--bitboard", "--size", "3"], True),
+    (["--batch", "--profile", os.devnull], False),
+    (["--size", "1"], False),
+]
+
+
+def run(extra):
+    """Returns (exit status, stderr) of benchmark.py with the extra arguments."""
+    done = subprocess.run([sys.executable, "benchmark.py", *BASE, *extra], cwd=ROOT,
+                          capture_output=True, text=True, timeout=600)
+    return done.returncode, done.stderr
+
+
+if __name__ == "__main__":
+    failures = 0
+    for extra, accepted in CASES:
+        status, stderr = run(extra)
+        if accepted:
+            ok = status == 0
+        else:
+            ok = status == 2 and "error:" in stderr and "Traceback" not in stderr
+        failures += not ok
+        expected = "runs" if accepted else "usage error"
+        print(f"{'ok' if ok else 'FAIL':<5} {' '.join(extra) or '(defaults)':<45} expected {expected}, exit {status}",
+              flush=True)
+        if not ok:
+            print(stderr.strip().splitlines()[-1] if stderr.strip() else "(no stderr)")
+    sys.exit(1 if failures else 0)
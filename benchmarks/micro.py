@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of engine and agent operations over a fixed board corpus.
+
+Every op runs on the same checked-in positions (benchmarks/corpus.json: early,
+mid and late game), so timings only move when the code does. Save a baseline,
+change something, then compare:
+
+    python -m benchmarks.micro --save baseline.json
+    python -m benchmarks.micro --compare baseline.json
+
+--compare reports the change of every op and exits with status 1 if any op
+got slower than --threshold. Timings are the best of --repeat runs, in
+microseconds per call (per position, per move where an op tries all four).
+Each run also times a fixed pure-Python loop; changes are scaled by how much
+that loop moved, so a busier or throttled machine does not read as a regression.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import bitboard
+from game_engine import Game2048, BitboardGame2048
+from game_state import GameState, StaticGame
+from ai_algs.feature_state import track
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus.json")
+PHASES = {"early": 0.1, "mid": 0.5, "late": 0.9}
+MOVES = ["Up", "Down", "Left", "Right"]
+SEARCH_AGENTS = ["Expectimax", "SnakeExpectimax"]
+
+
+def build_corpus(per_phase, seed, depth=2):
+    """Plays seeded SnakeExpectimax games (the strongest agent) and keeps per_phase positions per phase."""
+    from ai_algs.SnakeExpectimax_ai import SnakeExpectimaxAgent
+
+    random.seed(seed)
+    agent = SnakeExpectimaxAgent(depth=depth)
+    corpus = []
+    for _ in range(per_phase):
+        game = BitboardGame2048(mode="ai")
+        history = []
+        while not game.is_game_over():
+            history.append(game.get_state())
+            game.move_board(agent.get_action(game)[0])
+            game.spawn_tile()
+        for phase, frac in PHASES.items():
+            state = history[int(frac * (len(history) - 1))]
+            corpus.append({"phase": phase, "score": state.score, "board": bitboard.unpack(state.board)})
+    corpus.sort(key=lambda entry: list(PHASES).index(entry["phase"]))
+    return corpus
+
+
+def load_corpus(path=CORPUS):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _engine_ops(name, game_cls, corpus):
+    """Ops on a game instance per position; each resets the board before acting on it."""
+    games = []
+    for entry in corpus:
+        game = game_cls(mode="ai")
+        game.board = [row[:] for row in entry["board"]]
+        game.score = entry["score"]
+        games.append(game)
+    if game_cls is BitboardGame2048:
+        saved = [game._packed for game in games]
+
+        def reset(game, i):
+            game._packed = saved[i]
+    else:
+        # move_board rebinds game.board to new lists, so the saved rows are never mutated
+        saved = [game.board for game in games]
+
+        def reset(game, i):
+            game.board = saved[i]
+
+    def move_board():
+        for i, game in enumerate(games):
+            for move in MOVES:
+                reset(game, i)
+                game.move_board(move)
+        for i, game in enumerate(games):
+            reset(game, i)
+
+    def calls(method):
+        bound = [getattr(game, method) for game in games]
+
+        def op():
+            for fn in bound:
+                fn()
+        return op
+
+    n = len(games)
+    return {
+        f"{name}.move_board": (move_board, 4 * n),
+        f"{name}.get_valid_moves": (calls("get_valid_moves"), n),
+        f"{name}.is_game_over": (calls("is_game_over"), n),
+        f"{name}.get_empty_cells": (calls("get_empty_cells"), n),
+    }
+
+
+def _agent_ops(corpus, depths):
+    import importlib
+
+    states = [track(GameState(bitboard.pack(entry["board"]), entry["score"])) for entry in corpus]
+    positions = [StaticGame(GameState(state.board, state.score)) for state in states]
+    ops = {}
+    for name in ["Greedy"] + SEARCH_AGENTS:
+        cls = getattr(importlib.import_module(f"ai_algs.{name}_ai"), f"{name}Agent")
+        agent = cls() if name == "Greedy" else cls(depth=1, cache_size=0)
+        features = [agent._compute_features(state) for state in states]
+
+        def compute(agent=agent):
+            for state in states:
+                agent._compute_features(state)
+
+        def heuristic(agent=agent, features=features):
+            for feat in features:
+                agent._heuristic(feat)
+
+        ops[f"{name}._compute_features"] = (compute, len(states))
+        ops[f"{name}._heuristic"] = (heuristic, len(states))
+        if name == "Greedy":
+            ops[f"{name}.get_action"] = (lambda agent=agent: [agent.get_action(p) for p in positions],
+                                        len(positions))
+            continue
+        for depth in depths:
+            # Caching is off so every call does the full search
+            searcher = cls(depth=depth, cache_size=0)
+            ops[f"{name}.get_action[depth={depth}]"] = (
+                lambda searcher=searcher: [searcher.get_action(p) for p in positions], len(positions))
+    return ops
+
+
+def collect_ops(corpus, depths):
+    ops = {}
+    ops.update(_engine_ops("Game2048", Game2048, corpus))
+    ops.update(_engine_ops("BitboardGame2048", BitboardGame2048, corpus))
+    ops.update(_agent_ops(corpus, depths))
+    return ops
+
+
+def measure(op, calls, repeat, min_time=0.05):
+    """Best-of-repeat microseconds per call; each sample loops op until it takes min_time."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            op()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6 / (loops * calls)
+
+
+def _calibration():
+    total = 0
+    for i in range(10_000):
+        total += i * i % 7
+    return total
+
+
+def compare(baseline, results, threshold, speed=1.0):
+    """
+    Prints baseline vs current per op; returns the ops slower than the threshold.
+    speed is the current machine's time for the calibration loop over the baseline's.
+    """
+    slower = []
+    print(f"Machine speed factor (calibration loop now / baseline): {speed:.3f}")
+    print(f"{'op':<46} {'baseline us':>12} {'now us':>10} {'change':>8}")
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<46} {'-':>12} {now:>10.3f} {'new':>8}")
+            continue
+        change = now / (before * speed) - 1
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            slower.append((name, change))
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<46} {before:>12.3f} {now:>10.3f} {change:>+8.1%}{flag}")
+    for name in baseline:
+        if name not in results:
+            print(f"{name:<46} {baseline[name]:>12.3f} {'-':>10} {'gone':>8}")
+    if slower:
+        print(f"\n{len(slower)} op(s) slower than {threshold:.0%}:")
+        for name, change in sorted(slower, key=lambda item: -item[1]):
+            print(f"  {name}  {change:+.1%}")
+    else:
+        print(f"\nNo op slower than {threshold:.0%}.")
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time engine and agent ops over a fixed board corpus.")
+    parser.add_argument("--corpus", default=CORPUS, help="Board corpus (JSON)")
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 2, 3], help="Search depths for get_action")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per op; the best is kept")
+    parser.add_argument("--only", default=None, help="Only run ops whose name contains this text")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown reported as a regression (default 0.10 = 10%%)")
+    parser.add_argument("--write-corpus", type=int, metavar="PER_PHASE", default=None,
+                        help="Regenerate the corpus with this many positions per phase and exit")
+    parser.add_argument("--seed", type=int, default=2048, help="Seed for --write-corpus")
+    args = parser.parse_args()
+
+    if args.write_corpus is not None:
+        corpus = build_corpus(args.write_corpus, args.seed)
+        with open(args.corpus, "w") as f:
+            f.write("[\n" + ",\n".join(json.dumps(entry) for entry in corpus) + "\n]\n")
+        print(f"Wrote {len(corpus)} positions to {args.corpus}")
+        sys.exit(0)
+
+    corpus = load_corpus(args.corpus)
+    counts = {phase: sum(1 for entry in corpus if entry["phase"] == phase) for phase in PHASES}
+    print(f"{len(corpus)} positions ({', '.join(f'{n} {phase}' for phase, n in counts.items())}), "
+          f"Python {platform.python_version()}")
+
+    calibration = measure(_calibration, 1, args.repeat)
+    results = {}
+    for name, (op, calls) in collect_ops(corpus, args.depths).items():
+        if args.only and args.only not in name:
+            continue
+        results[name] = measure(op, calls, args.repeat)
+        if not args.compare:
+            print(f"{name:<46} {results[name]:>10.3f} us")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": platform.python_version(), "corpus": len(corpus),
+                       "calibration_us": calibration, "results": results}, f, indent=2)
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline["results"], results, args.threshold, calibration / baseline["calibration_us"]):
+            sys.exit(1)
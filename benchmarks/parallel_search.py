@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Measures get_action latency of the Expectimax agents against the number of
+search workers, and checks that every worker count picks the serial move.
+
+    python -m benchmarks.parallel_search --agent Expectimax --depth 4 --workers 1 2 4 8
+"""
+import argparse
+import importlib
+import os
+import random
+import time
+
+from game_engine import BitboardGame2048
+from game_state import StaticGame
+from ai_algs.Greedy_ai import GreedyAgent
+
+
+def sample_positions(count, seed):
+    """Plays seeded Greedy games and keeps positions from the early, mid and late game."""
+    random.seed(seed)
+    positions = []
+    greedy = GreedyAgent()
+    while len(positions) < count:
+        game = BitboardGame2048(mode="ai")
+        history = []
+        while not game.is_game_over():
+            history.append(game.get_state())
+            move, *_ = greedy.get_action(game)
+            game.move_board(move)
+            game.spawn_tile()
+        for frac in (0.1, 0.5, 0.9):
+            positions.append(history[int(frac * (len(history) - 1))])
+    return positions[:count]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel root evaluation speedup.")
+    parser.add_argument("--agent", choices=["Expectimax", "SnakeExpectimax"], default="Expectimax")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--positions", type=int, default=9)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--split", choices=["root", "chance"], default="chance")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    mod = importlib.import_module(f"ai_algs.{args.agent}_ai")
+    AgentClass = getattr(mod, f"{args.agent}Agent")
+    positions = [StaticGame(s) for s in sample_positions(args.positions, args.seed)]
+
+    print(f"{args.agent} depth {args.depth}, {len(positions)} positions, split={args.split}, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>8}  {'ms/move':>10}  {'speedup':>8}  moves")
+    serial_time = None
+    serial_moves = None
+    for workers in args.workers:
+        # Caching is off so every run does the full search
+        agent = AgentClass(depth=args.depth, cache_size=0, workers=workers if workers > 1 else 0,
+                           parallel_split=args.split)
+        agent.get_action(positions[0])  # warm up the pool
+        start = time.perf_counter()
+        moves = [agent.get_action(p)[0] for p in positions]
+        elapsed = time.perf_counter() - start
+        agent.close()
+        if serial_time is None:
+            serial_time, serial_moves = elapsed, moves
+        same = "same" if moves == serial_moves else "DIFFERENT"
+        print(f"{workers:>8}  {1000 * elapsed / len(positions):>10.1f}  "
+              f"{serial_time / elapsed:>7.2f}x  {same}")
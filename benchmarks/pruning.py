@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Compares pruned and unpruned Expectimax on the micro benchmark corpus: every
+pruning configuration must pick the same move as plain search on every
+position. Reports the time, nodes expanded and fraction of chance-node
+spawns pruned per depth. All searches run without a cache, so each one
+explores its own tree from scratch.
+
+    python -m benchmarks.pruning --agent SnakeExpectimax --depths 2 3 4
+"""
+import argparse
+import importlib
+import sys
+
+import bitboard
+from game_state import GameState, StaticGame
+from benchmarks.micro import load_corpus
+from benchmarks.batch_search import timed_moves
+
+CONFIGS = [
+    ("star1", {"pruning": True}),
+    ("star1+heuristic", {"pruning": True, "move_ordering": "heuristic"}),
+    ("star1+history", {"pruning": True, "move_ordering": "history"}),
+]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pruned vs unpruned Expectimax.")
+    parser.add_argument("--agent", choices=["Expectimax", "SnakeExpectimax"], default="Expectimax")
+    parser.add_argument("--depths", type=int, nargs="+", default=[2, 3, 4])
+    args = parser.parse_args()
+
+    AgentClass = getattr(importlib.import_module(f"ai_algs.{args.agent}_ai"), f"{args.agent}Agent")
+    positions = [StaticGame(GameState(bitboard.pack(entry["board"]), entry["score"])) for entry in load_corpus()]
+    print(f"{args.agent}, {len(positions)} positions")
+    print(f"{'depth':>5} {'search':<16} {'time s':>8} {'speedup':>8} {'nodes':>11} {'pruned':>7} {'moves differ':>13}")
+    mismatches = 0
+    for depth in args.depths:
+        plain = AgentClass(depth=depth, cache_size=0)
+        plain_moves, plain_time = timed_moves(plain, positions)
+        print(f"{depth:5d} {'none':<16} {plain_time:8.2f} {1:7.1f}x {sum(plain.nodes.values()):11,d} "
+              f"{0:6.1%} {0:13d}", flush=True)
+        for name, options in CONFIGS:
+            agent = AgentClass(depth=depth, cache_size=0, **options)
+            moves, elapsed = timed_moves(agent, positions)
+            differ = sum(a != b for a, b in zip(plain_moves, moves))
+            mismatches += differ
+            print(f"{depth:5d} {name:<16} {elapsed:8.2f} {plain_time / elapsed:7.1f}x "
+                  f"{sum(agent.nodes.values()):11,d} {agent.pruned_fraction:6.1%} {differ:13d}", flush=True)
+    sys.exit(1 if mismatches else 0)
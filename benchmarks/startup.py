@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Measures cold-start cost of the headless modules: wall time and peak RSS of a
+fresh interpreter that imports each module (and, optionally, plays one move).
+
+    python -m benchmarks.startup --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in a child interpreter; prints seconds spent importing and peak RSS in KiB
+_PROBE = """
+import resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+gui = [name for name in ("tkinter", "matplotlib") if name in sys.modules]
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, ",".join(gui) or "-")
+"""
+
+MODULES = [
+    "bitboard",
+    "game_engine",
+    "game_2048",
+    "ai_algs.Greedy_ai",
+    "ai_algs.Expectimax_ai",
+    "ai_algs.SnakeExpectimax_ai",
+]
+
+
+def probe(module):
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(module=module)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[0]), int(out[1]), out[2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and memory of the headless modules")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("modules", nargs="*", default=MODULES, help="Modules to import")
+    args = parser.parse_args()
+
+    # Baseline: an interpreter that imports nothing
+    base_rss = probe("sys")[1]
+    print(f"{'module':<28} {'import ms':>10} {'peak RSS MiB':>13} {'over bare':>10}  GUI modules")
+    for module in args.modules:
+        runs = [probe(module) for _ in range(args.repeat)]
+        ms = statistics.median(run[0] for run in runs) * 1000
+        rss = max(run[1] for run in runs)
+        print(f"{module:<28} {ms:>10.1f} {rss / 1024:>13.1f} {(rss - base_rss) / 1024:>10.1f}  {runs[0][2]}")
+
+
+if __name__ == "__main__":
+    main()
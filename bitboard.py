@@ -0,0 +1,183 @@
+"""
+Packed bitboard helpers for the 4x4 game.
+
+A board is a single 64-bit int holding 16 cells of 4 bits each. Every cell
+stores the log2 of its tile (0 for an empty cell, 1 for a 2, 2 for a 4, ...).
+Row ``r`` lives in bits ``16*r`` to ``16*r + 15`` and column ``c`` of that
+row is the nibble at ``4*c`` inside it.
+
+Left/Right moves are lookups in 65,536-entry row tables built once when the
+module is imported; Up/Down transpose the board and reuse the same tables.
+The largest tile a nibble can hold is 32768, so two 32768 tiles never merge.
+"""
+
+import itertools
+
+SIZE = 4
+MOVES = ("Up", "Down", "Left", "Right")
+
+ROW_MASK = 0xFFFF
+CELL_MASK = 0xF
+MAX_EXPONENT = 15
+
+
+def _move_row_left(cells):
+    """Slide and merge one row of exponents to the left, like Game2048.move_board."""
+    tiles = [v for v in cells if v]
+    out = 0
+    score = 0
+    shift = 0
+    i = 0
+    while i < len(tiles):
+        v = tiles[i]
+        if i + 1 < len(tiles) and v == tiles[i + 1] and v < MAX_EXPONENT:
+            v += 1
+            score += 1 << v
+            i += 2
+        else:
+            i += 1
+        out |= v << shift
+        shift += 4
+    return out, score
+
+
+def _build_tables():
+    # Every packed row in index order: the last product element is the lowest nibble
+    rows = [cells[::-1] for cells in itertools.product(range(16), repeat=SIZE)]
+    left, score_left = map(list, zip(*(_move_row_left(cells) for cells in rows)))
+    # Moving right is moving the mirrored row left, mirrored back
+    mirror = [(r & 0xF) << 12 | (r >> 4 & 0xF) << 8 | (r >> 8 & 0xF) << 4 | r >> 12 for r in range(ROW_MASK + 1)]
+    right = [mirror[left[mirror[r]]] for r in range(ROW_MASK + 1)]
+    score_right = [score_left[mirror[r]] for r in range(ROW_MASK + 1)]
+    empty_by_mask = [tuple(c for c in range(SIZE) if mask >> c & 1) for mask in range(16)]
+    empty_cols = [
+        empty_by_mask[(c0 == 0) | (c1 == 0) << 1 | (c2 == 0) << 2 | (c3 == 0) << 3]
+        for c0, c1, c2, c3 in rows
+    ]
+    row_max = [max(cells) for cells in rows]
+    return left, right, score_left, score_right, empty_cols, row_max
+
+
+ROW_LEFT, ROW_RIGHT, SCORE_LEFT, SCORE_RIGHT, ROW_EMPTY_COLS, ROW_MAX = _build_tables()
+
+
+def transpose(board):
+    """Swap rows and columns of a packed board."""
+    a1 = board & 0xF0F00F0FF0F00F0F
+    a2 = board & 0x0000F0F00000F0F0
+    a3 = board & 0x0F0F00000F0F0000
+    a = a1 | (a2 << 12) | (a3 >> 12)
+    b1 = a & 0xFF00FF0000FF00FF
+    b2 = a & 0x00FF00FF00000000
+    b3 = a & 0x00000000FF00FF00
+    return b1 | (b2 >> 24) | (b3 << 24)
+
+
+def move_rows(board, table, scores):
+    """Applies a row table (ROW_LEFT or ROW_RIGHT) to all four rows; returns (board, score_gained)."""
+    r0 = board & ROW_MASK
+    r1 = (board >> 16) & ROW_MASK
+    r2 = (board >> 32) & ROW_MASK
+    r3 = (board >> 48) & ROW_MASK
+    return (
+        table[r0] | table[r1] << 16 | table[r2] << 32 | table[r3] << 48,
+        scores[r0] + scores[r1] + scores[r2] + scores[r3],
+    )
+
+
+def move(board, direction):
+    """
+    Returns (new_board, score_gained) after sliding the packed board in the
+    given direction ("Up", "Down", "Left" or "Right").
+    """
+    if direction == "Left":
+        return move_rows(board, ROW_LEFT, SCORE_LEFT)
+    if direction == "Right":
+        return move_rows(board, ROW_RIGHT, SCORE_RIGHT)
+    if direction == "Up":
+        moved, score = move_rows(transpose(board), ROW_LEFT, SCORE_LEFT)
+    elif direction == "Down":
+        moved, score = move_rows(transpose(board), ROW_RIGHT, SCORE_RIGHT)
+    else:
+        raise ValueError(f"unknown move: {direction!r}")
+    return transpose(moved), score
+
+
+def valid_moves(board):
+    """Returns the moves that change the board, in MOVES order."""
+    return [m for m in MOVES if move(board, m)[0] != board]
+
+
+def get_cell(board, r, c):
+    """Returns the exponent stored at (r, c)."""
+    return (board >> (16 * r + 4 * c)) & CELL_MASK
+
+
+def set_cell(board, r, c, exponent):
+    """Returns a copy of the board with the exponent at (r, c) replaced."""
+    shift = 16 * r + 4 * c
+    return (board & ~(CELL_MASK << shift)) | (exponent << shift)
+
+
+def empty_cells(board):
+    """Returns all empty (row, col) positions in row-major order."""
+    return [
+        (r, c)
+        for r in range(SIZE)
+        for c in ROW_EMPTY_COLS[(board >> (16 * r)) & ROW_MASK]
+    ]
+
+
+def count_empty(board):
+    return sum(len(ROW_EMPTY_COLS[(board >> (16 * r)) & ROW_MASK]) for r in range(SIZE))
+
+
+def max_exponent(board):
+    return max(ROW_MAX[(board >> (16 * r)) & ROW_MASK] for r in range(SIZE))
+
+
+def tile_sum(board):
+    """Sum of the tile values; reads every nibble, so it suits packed boards of any size."""
+    total = 0
+    while board:
+        exponent = board & CELL_MASK
+        if exponent:
+            total += 1 << exponent
+        board >>= 4
+    return total
+
+
+def is_game_over(board):
+    """True when the board is full and no adjacent tiles can merge."""
+    if count_empty(board):
+        return False
+    # On a full board Left changes it iff Right does, and likewise Up/Down.
+    if move_rows(board, ROW_LEFT, SCORE_LEFT)[0] != board:
+        return False
+    columns = transpose(board)
+    return move_rows(columns, ROW_LEFT, SCORE_LEFT)[0] == columns
+
+
+def tile_to_exponent(value):
+    return value.bit_length() - 1 if value else 0
+
+
+def exponent_to_tile(exponent):
+    return 1 << exponent if exponent else 0
+
+
+def pack(rows):
+    """Packs a list-of-lists board of tile values into an int."""
+    board = 0
+    for r in range(SIZE):
+        for c in range(SIZE):
+            board |= tile_to_exponent(rows[r][c]) << (16 * r + 4 * c)
+    return board
+
+
+def unpack(board):
+    """Unpacks an int into a list-of-lists board of tile values."""
+    return [
+        [exponent_to_tile((board >> (16 * r + 4 * c)) & CELL_MASK) for c in range(SIZE)]
+        for r in range(SIZE)
+    ]
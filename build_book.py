@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Builds a position book (see ai_algs/position_book.py) for a search agent.
+
+Positions are counted from benchmark play, either replayed from a
+game_record file (--records) or from fresh seeded games at a shallow depth.
+The most frequent ones, up to symmetry, are then searched deeply on a
+process pool and their best moves written to the book.
+
+    python benchmark.py --agent Expectimax --depth 2 --games 200 --bitboard --record games.rec
+    python build_book.py --agent Expectimax --records games.rec --depth 5 --positions 5000 --out book.bin
+"""
+import argparse
+import collections
+import multiprocessing
+import os
+import random
+import time
+
+import bitboard
+import symmetry
+from benchmark import make_agent, game_seeds
+from game_engine import BitboardGame2048
+from game_state import GameState, StaticGame
+from ai_algs.position_book import write_book
+
+
+def positions_from_records(path):
+    """Yields every position a move was played from in a game_record file."""
+    from game_record import RecordReader
+
+    with RecordReader(path) as reader:
+        for game in reader:
+            for position in reader.replay(game):
+                if position.ply < game.moves:
+                    yield position.board
+
+
+def positions_from_games(agent_name, depth, games, seed):
+    """Plays seeded games and yields every position a move was played from."""
+    agent = make_agent(agent_name, depth=depth)
+    for game_seed in game_seeds(seed, games):
+        random.seed(game_seed)
+        game = BitboardGame2048(mode="ai")
+        while not game.is_game_over():
+            yield game.get_state().board
+            game.move_board(agent.get_action(game)[0])
+            game.spawn_tile()
+
+
+_worker = {}
+
+
+def _init_worker(agent_name, depth):
+    _worker['agent'] = make_agent(agent_name, depth=depth)
+
+
+def _solve(board):
+    return board, _worker['agent'].get_action(StaticGame(GameState(board, 0)))[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a position book of deeply searched moves.")
+    parser.add_argument("--agent", choices=["Expectimax", "SnakeExpectimax"], default="Expectimax")
+    parser.add_argument("--depth", type=int, default=5, help="Search depth for the book moves")
+    parser.add_argument("--positions", type=int, default=2000, help="Most frequent positions to store")
+    parser.add_argument("--min-count", type=int, default=2, help="Skip positions seen fewer times than this")
+    parser.add_argument("--records", default=None, help="Count positions from this game_record file")
+    parser.add_argument("--games", type=int, default=100, help="Otherwise play this many games to count positions")
+    parser.add_argument("--play-depth", type=int, default=2, help="Search depth of those games")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", default="book.bin")
+    args = parser.parse_args()
+
+    group = make_agent(args.agent).symmetries
+    if args.records:
+        boards = positions_from_records(args.records)
+    else:
+        boards = positions_from_games(args.agent, args.play_depth, args.games, args.seed)
+    counts = collections.Counter(symmetry.canonical_board(board, group) for board in boards)
+    common = [(board, n) for board, n in counts.most_common(args.positions) if n >= args.min_count]
+    total = sum(counts.values())
+    covered = sum(n for _, n in common)
+    print(f"{total:,} positions seen, {len(counts):,} distinct; the {len(common):,} kept cover "
+          f"{covered / max(1, total):.1%} of them")
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers, initializer=_init_worker, initargs=(args.agent, args.depth)) as pool:
+        entries = dict(pool.imap_unordered(_solve, [board for board, _ in common], chunksize=8))
+    write_book(args.out, entries, group)
+    print(f"Searched {len(entries):,} positions at depth {args.depth} in {time.perf_counter() - start:.1f}s; "
+          f"wrote {args.out} ({os.path.getsize(args.out):,} bytes)")
+    for board, n in common[:3]:
+        print(f"  seen {n:5d}x  {bitboard.unpack(board)} -> {entries[board]}")
@@ -1,155 +1,43 @@
-import tkinter as tk
-import random
 import importlib
-import copy
+import queue
+import threading
+import time
 
-import matplotlib.pyplot as plt
-
-class Game2048:
-
-    def __init__(self, mode="manual", algorithm=None):
-        self.size = 4
-        self.board = [[0] * self.size for _ in range(self.size)]
-        self.score = 0
-        self.moves = ["Up", "Down", "Left", "Right"]
-
-        ## handle ai
-        self.algorithm = algorithm  # Store the chosen AI algorithm
-        self.mode = mode
-        
-        self.spawn_tile()
-        self.spawn_tile()
-        self.update_board()
-        
-    
-    def spawn_tile(self):
-        empty_cells = [(i, j) for i in range(self.size) for j in range(self.size) if self.board[i][j] == 0]
-        if empty_cells:
-            i, j = random.choice(empty_cells)
-            self.board[i][j] = 2 if random.random() < 0.9 else 4
-
-    def update_board(self):
-        return self.board, self.score
-    
-    
-    # def handle_keypress(self, event):
-    #     if self.mode == "manual":
-    #         key = event.keysym
-    #         if key in self.moves:
-    #             old_board = [row[:] for row in self.board]
-    #             self.move_board(key)
-    #             if old_board != self.board:
-    #                 self.spawn_tile()
-    #                 self.update_board()
-    #     else:
-    #         return  # Ignore key presses in AI mode
-        
-
-    
-    def move_board(self, direction):
-        def compress(row):
-            """Shift nonzero elements left."""
-            new_row = [value for value in row if value != 0]
-            new_row += [0] * (self.size - len(new_row))
-            return new_row
-
-        def merge(row):
-            """Merge adjacent equal values."""
-            for i in range(self.size - 1):
-                if row[i] == row[i + 1] and row[i] != 0:
-                    row[i] *= 2
-                    row[i + 1] = 0
-                    self.score += row[i]  # Correctly update score
-            return row
-
-        def move(row):
-            """Compress, merge, then compress again."""
-            return compress(merge(compress(row)))
-
-        if direction == 'Up':
-            self.board = list(map(list, zip(*self.board)))  # Transpose to treat Up as Left
-            self.board = [move(row) for row in self.board]  # Move Left
-            self.board = list(map(list, zip(*self.board)))  # Transpose back
-
-        elif direction == 'Down':
-            self.board = list(map(list, zip(*self.board[::-1])))  # Reverse & Transpose
-            self.board = [move(row) for row in self.board]  # Move Left
-            self.board = list(map(list, zip(*self.board)))[::-1]  # Transpose back & Reverse
-
-        elif direction == 'Left':
-            self.board = [move(row) for row in self.board]
-
-        elif direction == 'Right':
-            self.board = [move(row[::-1])[::-1] for row in self.board]
-        
-    def is_game_over(self):
-        # Check for empty spaces
-        for row in self.board:
-            if 0 in row:
-                return False
-            
-        # Check for adjacent tiles
-        for i in range(self.size):
-            for j in range(self.size):
-                if i + 1 < self.size and self.board[i][j] == self.board[i + 1][j]:
-                    return False  # Merge possible vertically
-                if j + 1 < self.size and self.board[i][j] == self.board[i][j + 1]:
-                    return False  # Merge possible horizontally
-
-        # If no empty spaces and no valid moves, the game is over
-        return True
-    
-    def get_valid_moves(self):
-        valid_moves = []
-        for move in self.moves:
-            old_board = self.board  # Save the current state
-            self.move_board(move)  # Try the move
-            if old_board != self.board:  # If the board changed, the move is valid
-                valid_moves.append(move)
-            self.board = old_board  # Revert the board state
-
-        return valid_moves
-    
-    def get_empty_cells(self):
-        """
-        Returns a list of all empty cell positions where a new tile can be placed.
-        Each position is represented as a tuple (row, col).
-        """
-        empty_cells = [(r, c) for r in range(self.size) for c in range(self.size) if self.board[r][c] == 0]
-        return empty_cells
-    
-    def generate_successor(self, action):
-        """
-        Returns a new Game2048 instance with the board state after applying the given move.
-        The original game state remains unchanged.
-        """
-        successor = copy.deepcopy(self)  # Create a deep copy of the current game state
-        successor.move_board(action)  # Apply the move to the copied board
-        
-
-        return successor
-    
-    def get_max_tile(self):
-        """ 
-        Is going to need to be changed for efficiency
-        """
-        max = 0
-        for i in self.board:
-            for j in i:
-                if j > max:
-                    max = j
-        return max
-    
+# The engine lives in game_engine.py; it is re-exported here for existing imports.
+# tkinter and matplotlib are imported only when the GUI is actually used.
+from game_engine import Game2048, BitboardGame2048
+from telemetry import FeatureTelemetry, downsample, load_stream
 
+# Heuristic values the agents return after the move, as labelled in the plots
+FEATURES = ('position', 'empty space', 'mono', 'merge pot')
+FEATURE_COLORS = ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728')
 
 class Game2048GUI:
-    def __init__(self, master, game):
+    """
+    Tk front end. In AI mode the agent plays on a background thread that owns the
+    game and posts (board, score, features) snapshots to a queue; the Tk loop
+    drains the queue at most fps times a second and draws only the latest board,
+    so slow searches never freeze the window and fast agents are not held back
+    by widget updates.
+
+    The agent's heuristic values go to a fixed-size FeatureTelemetry (the last
+    `window` moves plus running min/max/mean, optionally streamed in full to
+    `telemetry_file`) and are drawn on a live chart below the board.
+    """
+    def __init__(self, master, game, fps=30, delay_ms=0, window=2000, telemetry_file=None):
+        import tkinter as tk
+
         self.master = master
         self.game = game
-        self.position = []
-        self.empty_space = []
-        self.monotonicity = []
-        self.merge_potential = []
+        self.telemetry = FeatureTelemetry(FEATURES, window, telemetry_file)
+        self.frame_ms = max(1, round(1000 / fps))
+        # Pause between AI moves, read by the worker; set from the speed slider
+        self.delay_ms = delay_ms
+        self._updates = queue.Queue()
+        self._go = threading.Event()  # set while the worker may play
+        self._paused = False
+        self._stopped = False
+        self._worker = None
 
         # Score Frame
         self.score_frame = tk.Frame(self.master)
@@ -160,14 +48,43 @@ class Game2048GUI:
         # Game Board Frame
         self.frame = tk.Frame(self.master)
         self.frame.grid(row=1, column=0)
-        self.labels = [[tk.Label(self.frame, text='', width=6, height=3, font=('Arial', 24, 'bold'), relief='solid')
+        # Shrink the tiles of larger boards to keep the window the size of a 4x4 one
+        font_size = max(10, 24 * 4 // self.game.size)
+        self.labels = [[tk.Label(self.frame, text='', width=6, height=3, font=('Arial', font_size, 'bold'), relief='solid')
                         for _ in range(self.game.size)] for _ in range(self.game.size)]
         for i in range(self.game.size):
             for j in range(self.game.size):
                 self.labels[i][j].grid(row=i, column=j, padx=5, pady=5)
-        
+        # Values and score currently drawn, so redraws only touch what changed
+        self._shown = [[None] * self.game.size for _ in range(self.game.size)]
+        self._shown_score = None
+
+        # AI controls: pause/resume, single step and delay between moves
+        if self.game.mode == "ai":
+            self.controls = tk.Frame(self.master)
+            self.controls.grid(row=2, column=0, pady=10)
+            self.pause_button = tk.Button(self.controls, text="Pause", width=8, command=self.toggle_pause)
+            self.pause_button.pack(side='left', padx=5)
+            self.step_button = tk.Button(self.controls, text="Step", width=8, command=self.step, state='disabled')
+            self.step_button.pack(side='left', padx=5)
+            self.speed = tk.Scale(self.controls, from_=0, to=1000, orient='horizontal', length=200,
+                                  label="Delay (ms)", command=self.set_delay)
+            self.speed.set(delay_ms)
+            self.speed.pack(side='left', padx=5)
+
+            # Live chart: one line per feature, each scaled to its own range in the window
+            self.chart_width, self.chart_height = 420, 160
+            self.chart = tk.Canvas(self.master, width=self.chart_width, height=self.chart_height + 20 * len(FEATURES),
+                                   bg='white')
+            self.chart.grid(row=3, column=0, padx=10, pady=10)
+            self.chart_lines = [self.chart.create_line(0, 0, 0, 0, fill=color) for color in FEATURE_COLORS]
+            self.chart_text = [self.chart.create_text(5, self.chart_height + 10 + 20 * i, anchor='w', fill=color,
+                                                      font=('Arial', 10))
+                               for i, color in enumerate(FEATURE_COLORS)]
+
         self.update_board()
         self.master.bind("<KeyPress>", self.handle_keypress)  # Bind keyboard events
+        self.master.protocol("WM_DELETE_WINDOW", self.close)
 
     def handle_keypress(self, event):
         """Handles user input for manual play."""
@@ -184,38 +101,126 @@ class Game2048GUI:
 
 
     def run_ai(self):
-        """Runs AI moves continuously in AI mode."""
-        if not self.game.is_game_over():
-            # get best move
-            move, position, empty_space, monotonicity, merge = self.game.algorithm(self.game)  # AI decides move
-            
+        """Starts the AI on a background thread and begins polling for its moves."""
+        self._worker = threading.Thread(target=self._play_ai, daemon=True)
+        self._go.set()
+        self._worker.start()
+        self.master.after(self.frame_ms, self._poll_ai)
+
+    def _play_ai(self):
+        """Worker thread: plays moves on self.game and posts snapshots; never touches Tk."""
+        try:
+            while not self.game.is_game_over():
+                self._go.wait()
+                if self._stopped:
+                    return
+                if self._paused:
+                    self._go.clear()  # Step releases exactly one move
+                # get best move
+                move, *features = self.game.algorithm(self.game)  # AI decides move
+
+                ## update board
+                old_board = [row[:] for row in self.game.board]
+                self.game.move_board(move)  # Apply move
+                board = self.game.board
+                if board != old_board:
+                    self.game.spawn_tile()
+                    board = self.game.board
+                self._updates.put(([row[:] for row in board], self.game.score, features))
+                if self.delay_ms:
+                    time.sleep(self.delay_ms / 1000)
+            self._updates.put(None)
+        except Exception as exc:
+            self._updates.put(exc)
+
+    def _poll_ai(self):
+        """Drains the worker's snapshots, stores their features and draws the latest board."""
+        latest = None
+        finished = False
+        while True:
+            try:
+                update = self._updates.get_nowait()
+            except queue.Empty:
+                break
+            if update is None:
+                finished = True
+                break
+            if isinstance(update, Exception):
+                raise update
+            latest = update
             ## Store best hueristic scores
-            self.position.append(position)
-            self.empty_space.append(empty_space)
-            self.monotonicity.append(monotonicity)
-            self.merge_potential.append(merge)
-
-            ## update board
-            old_board = [row[:] for row in self.game.board]
-            self.game.move_board(move)  # Apply move
-            if self.game.board != old_board:
-                self.game.spawn_tile()
-                self.update_board()  # Update display
-            self.master.after(1, self.run_ai)  # Continue AI moves
-        else:
+            self.telemetry.append(update[2])
+        if latest is not None:
+            self.update_board(latest[0], latest[1])
+            self.update_chart()
+        if finished:
+            self.telemetry.close()
+            self.pause_button.config(state='disabled')
+            self.step_button.config(state='disabled')
             self.plot_hueristics()
-
-
-        
-
-
-    def update_board(self):
-        for i in range(self.game.size):
-            for j in range(self.game.size):
-                value = self.game.board[i][j]
-                self.labels[i][j]['text'] = str(value) if value != 0 else ''
-                self.labels[i][j]['bg'] = self.get_color(value)
-        self.score_label.config(text=f"Score: {self.game.score}")
+        elif not self._stopped:
+            self.master.after(self.frame_ms, self._poll_ai)
+
+    def update_chart(self):
+        """Moves each feature's line to the buffered window, downsampled to the chart width."""
+        telemetry = self.telemetry
+        width, height = self.chart_width, self.chart_height
+        for i, name in enumerate(FEATURES):
+            first, values = telemetry.series(i)
+            points = downsample(values, width // 2)
+            lo, hi = min(values), max(values)
+            span = (hi - lo) or 1
+            x_scale = (width - 10) / max(1, len(values) - 1)
+            coords = []
+            for x, value in points:
+                coords.append(5 + x * x_scale)
+                coords.append(height - 5 - (value - lo) * (height - 10) / span)
+            if len(points) == 1:
+                coords += coords
+            self.chart.coords(self.chart_lines[i], *coords)
+            low, high, mean = telemetry.mins[i], telemetry.maxs[i], telemetry.mean(i)
+            self.chart.itemconfig(self.chart_text[i],
+                                  text=f"{name}: min {low:,.1f}  max {high:,.1f}  mean {mean:,.1f}  "
+                                       f"(moves {first}-{telemetry.count - 1})")
+
+    def toggle_pause(self):
+        self._paused = not self._paused
+        if self._paused:
+            self._go.clear()
+            self.pause_button.config(text="Resume")
+            self.step_button.config(state='normal')
+        else:
+            self._go.set()
+            self.pause_button.config(text="Pause")
+            self.step_button.config(state='disabled')
+
+    def step(self):
+        """While paused, lets the worker play one move."""
+        if self._paused:
+            self._go.set()
+
+    def set_delay(self, value):
+        self.delay_ms = int(value)
+
+    def close(self):
+        self._stopped = True
+        self._go.set()  # Wake a paused worker so it can exit
+        self.telemetry.close()
+        self.master.destroy()
+
+    def update_board(self, board=None, score=None):
+        """Draws the given board (default: the game's), updating only cells whose value changed."""
+        if board is None:
+            board, score = self.game.board, self.game.score
+        for i, row in enumerate(board):
+            shown = self._shown[i]
+            for j, value in enumerate(row):
+                if shown[j] != value:
+                    shown[j] = value
+                    self.labels[i][j].config(text=str(value) if value != 0 else '', bg=self.get_color(value))
+        if score != self._shown_score:
+            self._shown_score = score
+            self.score_label.config(text=f"Score: {score}")
     
     def get_color(self, value):
         colors = {
@@ -226,18 +231,23 @@ class Game2048GUI:
         return colors.get(value, '#3c3a32')
     
     def plot_hueristics(self):
-            # Plot each list
-        x = range(len(self.position))
-        score = self.position + self.empty_space + self.monotonicity + self.merge_potential
+        import matplotlib.pyplot as plt
+
+        # Plot the full series if it was streamed to disk, otherwise the buffered window
+        if self.telemetry.stream_path is not None:
+            series = load_stream(self.telemetry.stream_path)
+            first = 0
+        else:
+            series = {}
+            for i, name in enumerate(FEATURES):
+                first, series[name] = self.telemetry.series(i)
 
-        plt.plot(x, self.position, label='position')
-        plt.plot(x, self.empty_space, label='empty space')
-        plt.plot(x, self.monotonicity, label='mono')
-        plt.plot(x, self.merge_potential, label='merge pot')
-        # plt.plot(x, score, label='score')
+        for name in FEATURES:
+            values = series[name]
+            plt.plot(range(first, first + len(values)), values, label=name)
 
         # Labels and legend
-        plt.xlabel('Index')
+        plt.xlabel('Move')
         plt.ylabel('Value')
         plt.title('Plot of 5 Lists')
         plt.legend()
@@ -253,10 +263,17 @@ if __name__ == "__main__":
     # Parse command-line arguments
     parser = argparse.ArgumentParser()
     parser.add_argument("--mode", choices=["manual", "ai"], default="manual", help="Game mode")
+    parser.add_argument("--bitboard", action="store_true", help="Use the packed bitboard engine")
+    parser.add_argument("--size", type=int, default=4, help="Board size (size x size cells)")
+    parser.add_argument("--fps", type=int, default=30, help="Cap on board redraws per second")
+    parser.add_argument("--delay-ms", type=int, default=0, help="Initial pause between AI moves")
+    parser.add_argument("--window", type=int, default=2000, help="Moves of heuristic values kept in memory")
+    parser.add_argument("--telemetry-file", default=None,
+                        help="Stream every move's heuristic values to this CSV file")
 
     # Dynamically import the selected algorithm (if AI mode is selected)
     if "ai" in parser.parse_known_args()[0].mode:
-        parser.add_argument("--algorithm", choices=["Random", "Greedy", "Expectimax", "SnakeExpectimax"], default="random", help="AI algorithm")
+        parser.add_argument("--algorithm", choices=["Random", "Greedy", "Expectimax", "SnakeExpectimax", "NTuple", "MonteCarlo"], default="random", help="AI algorithm")
         args = parser.parse_args()
         ai_module = importlib.import_module(f"ai_algs.{args.algorithm}_ai")  # Import module dynamically
         ai_class = getattr(ai_module, f"{args.algorithm}Agent")  # Get the class from the module
@@ -267,13 +284,16 @@ if __name__ == "__main__":
         ai_func = None
 
     # Create the tkinter root window
+    import tkinter as tk
     root = tk.Tk()
 
     # Create the Game2048 instance (game logic)
-    game = Game2048(mode=args.mode, algorithm=ai_func)
+    game_cls = BitboardGame2048 if args.bitboard else Game2048
+    game = game_cls(mode=args.mode, algorithm=ai_func, size=args.size)
 
     # Create the Game2048GUI instance (GUI)
-    gui = Game2048GUI(root, game)  # Pass the game logic to the GUI
+    gui = Game2048GUI(root, game, fps=args.fps, delay_ms=args.delay_ms, window=args.window,
+                      telemetry_file=args.telemetry_file)  # Pass the game logic to the GUI
 
     # Handle the AI mode
     if args.mode == "ai":
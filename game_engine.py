@@ -0,0 +1,247 @@
+"""
+Headless game engine: Game2048 and the packed BitboardGame2048.
+Importing this module loads only the game logic, no tkinter or matplotlib.
+Both play on boards of any size; packed boards other than 4x4 use nboard.py.
+"""
+import random
+import copy
+
+import bitboard
+import nboard
+from game_state import GameState
+
+class Game2048:
+
+    def __init__(self, mode="manual", algorithm=None, size=4):
+        self.size = size
+        self.board = [[0] * self.size for _ in range(self.size)]
+        self.score = 0
+        self.moves = ["Up", "Down", "Left", "Right"]
+
+        ## handle ai
+        self.algorithm = algorithm  # Store the chosen AI algorithm
+        self.mode = mode
+        
+        self.spawn_tile()
+        self.spawn_tile()
+        self.update_board()
+        
+    
+    def spawn_tile(self):
+        """Places a 2 (90%) or 4 on a random empty cell; returns (row, col, value), or None if full."""
+        empty_cells = [(i, j) for i in range(self.size) for j in range(self.size) if self.board[i][j] == 0]
+        if empty_cells:
+            i, j = random.choice(empty_cells)
+            self.board[i][j] = 2 if random.random() < 0.9 else 4
+            return i, j, self.board[i][j]
+        return None
+
+    def update_board(self):
+        return self.board, self.score
+    
+    
+    # def handle_keypress(self, event):
+    #     if self.mode == "manual":
+    #         key = event.keysym
+    #         if key in self.moves:
+    #             old_board = [row[:] for row in self.board]
+    #             self.move_board(key)
+    #             if old_board != self.board:
+    #                 self.spawn_tile()
+    #                 self.update_board()
+    #     else:
+    #         return  # Ignore key presses in AI mode
+        
+
+    
+    def move_board(self, direction):
+        def compress(row):
+            """Shift nonzero elements left."""
+            new_row = [value for value in row if value != 0]
+            new_row += [0] * (self.size - len(new_row))
+            return new_row
+
+        def merge(row):
+            """Merge adjacent equal values."""
+            for i in range(self.size - 1):
+                if row[i] == row[i + 1] and row[i] != 0:
+                    row[i] *= 2
+                    row[i + 1] = 0
+                    self.score += row[i]  # Correctly update score
+            return row
+
+        def move(row):
+            """Compress, merge, then compress again."""
+            return compress(merge(compress(row)))
+
+        if direction == 'Up':
+            self.board = list(map(list, zip(*self.board)))  # Transpose to treat Up as Left
+            self.board = [move(row) for row in self.board]  # Move Left
+            self.board = list(map(list, zip(*self.board)))  # Transpose back
+
+        elif direction == 'Down':
+            self.board = list(map(list, zip(*self.board[::-1])))  # Reverse & Transpose
+            self.board = [move(row) for row in self.board]  # Move Left
+            self.board = list(map(list, zip(*self.board)))[::-1]  # Transpose back & Reverse
+
+        elif direction == 'Left':
+            self.board = [move(row) for row in self.board]
+
+        elif direction == 'Right':
+            self.board = [move(row[::-1])[::-1] for row in self.board]
+        
+    def is_game_over(self):
+        # Check for empty spaces
+        for row in self.board:
+            if 0 in row:
+                return False
+            
+        # Check for adjacent tiles
+        for i in range(self.size):
+            for j in range(self.size):
+                if i + 1 < self.size and self.board[i][j] == self.board[i + 1][j]:
+                    return False  # Merge possible vertically
+                if j + 1 < self.size and self.board[i][j] == self.board[i][j + 1]:
+                    return False  # Merge possible horizontally
+
+        # If no empty spaces and no valid moves, the game is over
+        return True
+    
+    def get_valid_moves(self):
+        valid_moves = []
+        for move in self.moves:
+            old_board = self.board  # Save the current state
+            old_score = self.score
+            self.move_board(move)  # Try the move
+            if old_board != self.board:  # If the board changed, the move is valid
+                valid_moves.append(move)
+            self.board = old_board  # Revert the board state
+            self.score = old_score  # Trying a move must not count towards the score
+
+        return valid_moves
+    
+    def get_empty_cells(self):
+        """
+        Returns a list of all empty cell positions where a new tile can be placed.
+        Each position is represented as a tuple (row, col).
+        """
+        empty_cells = [(r, c) for r in range(self.size) for c in range(self.size) if self.board[r][c] == 0]
+        return empty_cells
+    
+    def generate_successor(self, action):
+        """
+        Returns a new Game2048 instance with the board state after applying the given move.
+        The original game state remains unchanged.
+        Only the board is copied; moves and the algorithm callback are shared.
+        """
+        successor = copy.copy(self)
+        successor.board = [row[:] for row in self.board]
+        successor.move_board(action)  # Apply the move to the copied board
+        return successor
+
+    def get_state(self):
+        """Returns an immutable GameState snapshot (packed board and score) for search."""
+        ops = bitboard if self.size == 4 else nboard.geometry(self.size)
+        return GameState(ops.pack(self.board), self.score)
+    
+    def get_max_tile(self):
+        """ 
+        Is going to need to be changed for efficiency
+        """
+        max = 0
+        for i in self.board:
+            for j in i:
+                if j > max:
+                    max = j
+        return max
+
+
+class _BoardRow(list):
+    """A row snapshot that writes cell assignments through to the packed board."""
+
+    def __init__(self, game, r, values):
+        super().__init__(values)
+        self._game = game
+        self._r = r
+
+    def __setitem__(self, c, value):
+        super().__setitem__(c, value)
+        game = self._game
+        game._packed = game._ops.set_cell(game._packed, self._r, c, bitboard.tile_to_exponent(value))
+        # Only keep the cached snapshot if this row belongs to it
+        current = game._rows
+        game._rows_key = game._packed if current is not None and current[self._r] is self else None
+
+
+class BitboardGame2048(Game2048):
+    """
+    Game2048 backed by a single packed integer (see bitboard.py, or nboard.py off 4x4).
+    Moves, valid-move checks, game-over checks and tile spawns run on the packed form;
+    `board` still reads and writes as a list of lists so existing agents work unchanged.
+    """
+
+    def __init__(self, mode="manual", algorithm=None, size=4):
+        # The bitboard module and an nboard.Geometry share one interface
+        self._ops = bitboard if size == 4 else nboard.geometry(size)
+        self._packed = 0
+        self._rows = None
+        self._rows_key = None
+        super().__init__(mode=mode, algorithm=algorithm, size=size)
+
+    @property
+    def board(self):
+        if self._rows_key != self._packed:
+            rows = self._ops.unpack(self._packed)
+            self._rows = [_BoardRow(self, r, row) for r, row in enumerate(rows)]
+            self._rows_key = self._packed
+        return self._rows
+
+    @board.setter
+    def board(self, rows):
+        self._packed = self._ops.pack(rows)
+
+    def __getstate__(self):
+        # The row snapshot points back at this instance; copies rebuild their own
+        state = self.__dict__.copy()
+        state['_rows'] = None
+        state['_rows_key'] = None
+        del state['_ops']  # modules do not pickle
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._ops = bitboard if self.size == 4 else nboard.geometry(self.size)
+
+    def generate_successor(self, action):
+        successor = copy.copy(self)  # The packed board is an int, so a shallow copy is enough
+        successor.move_board(action)
+        return successor
+
+    def get_state(self):
+        return GameState(self._packed, self.score)
+
+    def spawn_tile(self):
+        empty_cells = self._ops.empty_cells(self._packed)
+        if empty_cells:
+            i, j = random.choice(empty_cells)
+            exponent = 1 if random.random() < 0.9 else 2
+            self._packed = self._ops.set_cell(self._packed, i, j, exponent)
+            return i, j, 1 << exponent
+        return None
+
+    def move_board(self, direction):
+        if direction in self.moves:
+            self._packed, gained = self._ops.move(self._packed, direction)
+            self.score += gained
+
+    def is_game_over(self):
+        return self._ops.is_game_over(self._packed)
+
+    def get_valid_moves(self):
+        return self._ops.valid_moves(self._packed)
+
+    def get_empty_cells(self):
+        return self._ops.empty_cells(self._packed)
+
+    def get_max_tile(self):
+        return bitboard.exponent_to_tile(self._ops.max_exponent(self._packed))
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Compact append-only binary records of whole games.
+
+A file is an 8-byte magic followed by game records. Each record is a header
+
+    seed u64 | initial board u64 (packed, see bitboard.py) | moves u32 | score u32 | max exponent u8
+
+(little-endian, 25 bytes) and then one byte per move:
+
+    bits 0-1  move index in bitboard.MOVES
+    bits 2-5  cell the next tile spawned on (4 * row + col)
+    bit  6    the spawned tile was a 4
+    bit  7    a tile spawned at all
+
+The initial board and spawns are stored, not re-derived from the seed, so
+replay is exact and needs no RNG; the seed is kept to reproduce the game with
+the agent. RecordReader memory-maps the file and indexes games by their
+headers only, so queries touch just the games they replay.
+
+    python game_record.py games.rec --reached 1024
+"""
+import argparse
+import mmap
+import os
+import struct
+from typing import NamedTuple
+
+import bitboard
+
+MAGIC = b"2048REC\x01"
+_HEADER = struct.Struct("<QQIIB")
+_MOVE_INDEX = {move: i for i, move in enumerate(bitboard.MOVES)}
+
+
+def encode_step(move, spawn):
+    """One move byte; spawn is (row, col, value) as returned by spawn_tile, or None."""
+    code = _MOVE_INDEX[move]
+    if spawn is not None:
+        r, c, value = spawn
+        code |= (4 * r + c) << 2 | (value == 4) << 6 | 0x80
+    return code
+
+
+def decode_step(code):
+    """Returns (move, spawn) for a move byte, with spawn (row, col, value) or None."""
+    move = bitboard.MOVES[code & 3]
+    if not code & 0x80:
+        return move, None
+    cell = (code >> 2) & 0xF
+    return move, (cell >> 2, cell & 3, 4 if code & 0x40 else 2)
+
+
+class RecordWriter:
+    """Appends games to a record file, writing the magic if the file is new."""
+    def __init__(self, path):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if new:
+            self._file.write(MAGIC)
+
+    def write_game(self, seed, board, steps, score, max_tile):
+        """Appends one game: initial packed board and the bytes from encode_step."""
+        self._file.write(_HEADER.pack(seed, board, len(steps), score, bitboard.tile_to_exponent(max_tile)))
+        self._file.write(steps)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameRecord(NamedTuple):
+    index: int
+    seed: int
+    board: int  # initial packed board
+    moves: int
+    score: int
+    max_tile: int
+    offset: int  # of the first move byte in the file
+
+
+class Position(NamedTuple):
+    game: GameRecord
+    ply: int  # moves played before this position
+    board: int
+    score: int
+
+
+class RecordReader:
+    """Memory-mapped view of a record file; games are indexed from their headers on open."""
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size == 0:
+            raise ValueError(f"{path} is empty")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a game record file")
+        self.games = []
+        pos = len(MAGIC)
+        end = len(self._map)
+        while pos + _HEADER.size <= end:
+            seed, board, moves, score, max_exp = _HEADER.unpack_from(self._map, pos)
+            pos += _HEADER.size
+            if pos + moves > end:
+                break  # truncated by an interrupted append
+            self.games.append(GameRecord(len(self.games), seed, board, moves, score,
+                                         bitboard.exponent_to_tile(max_exp), pos))
+            pos += moves
+
+    def __len__(self):
+        return len(self.games)
+
+    def __iter__(self):
+        return iter(self.games)
+
+    def steps(self, game):
+        """Decoded (move, spawn) pairs of a game."""
+        return [decode_step(code) for code in self._map[game.offset:game.offset + game.moves]]
+
+    def replay(self, game):
+        """Yields every Position of a game, from the initial board to the final one."""
+        board, score = game.board, 0
+        yield Position(game, 0, board, score)
+        for ply, code in enumerate(self._map[game.offset:game.offset + game.moves], 1):
+            board, gained = bitboard.move(board, bitboard.MOVES[code & 3])
+            score += gained
+            if code & 0x80:
+                cell = (code >> 2) & 0xF
+                board = bitboard.set_cell(board, cell >> 2, cell & 3, 2 if code & 0x40 else 1)
+            yield Position(game, ply, board, score)
+
+    def positions(self, predicate, games=None):
+        """Yields replayed positions of the given games (default: all) for which predicate(position) holds."""
+        for game in self.games if games is None else games:
+            for position in self.replay(game):
+                if predicate(position):
+                    yield position
+
+    def reached(self, tile):
+        """
+        Yields, for every game that reached the tile, the positions from the one
+        where it first appears to the end of the game. Games whose header says
+        they never got there are skipped without being replayed.
+        """
+        exponent = bitboard.tile_to_exponent(tile)
+        for game in self.games:
+            if game.max_tile < tile:
+                continue
+            seen = False
+            for position in self.replay(game):
+                seen = seen or bitboard.max_exponent(position.board) >= exponent
+                if seen:
+                    yield position
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize or query a game record file.")
+    parser.add_argument("path")
+    parser.add_argument("--reached", type=int, default=None,
+                        help="Count the positions in games from the point they reach this tile")
+    parser.add_argument("--verify", action="store_true", help="Replay every game and check its final score")
+    args = parser.parse_args()
+
+    with RecordReader(args.path) as reader:
+        moves = sum(game.moves for game in reader)
+        size = os.path.getsize(args.path)
+        print(f"{len(reader):,} games, {moves:,} moves, {size:,} bytes "
+              f"({size / max(1, len(reader)):,.0f} bytes/game)")
+        if args.verify:
+            bad = [game.index for game in reader if list(reader.replay(game))[-1].score != game.score]
+            print("All games replay to their recorded score" if not bad else f"Score mismatch in games {bad}")
+        if args.reached is not None:
+            games = set()
+            count = 0
+            for position in reader.reached(args.reached):
+                games.add(position.game.index)
+                count += 1
+            print(f"{count:,} positions in {len(games):,} games at or after reaching {args.reached}")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Local asyncio server hosting many concurrent 2048 games.
+
+Clients speak newline-delimited JSON over a Unix socket or localhost TCP:
+one request per line, answered by one line, in order per connection.
+
+    {"op": "new", "size": 4}                    -> {"game": 1, "board": [[...]], "score": 0, "over": false}
+    {"op": "state", "game": 1}                  -> {"game": 1, "board": ..., "score": ..., "over": ...}
+    {"op": "move", "game": 1, "move": "Left"}   -> the state plus "moved"
+    {"op": "agent_move", "game": 1}             -> the state plus the "move" the agent played
+    {"op": "close", "game": 1}                  -> {"closed": 1}
+    {"op": "stats"}                             -> request and batch counts
+
+Errors come back as {"error": "..."}.
+
+agent_move requests from every connection are gathered into micro-batches:
+a batch is evaluated once --max-batch boards are pending, or --max-delay-ms
+after the first one arrived, with a single call to the agent's
+get_batch_actions (the batch_engine.py interface, which the Expectimax agents
+serve with one batched search over all boards, after looking each board up
+in the --book if one is given). Batches run on one worker
+thread, so the event loop keeps collecting the next batch meanwhile. Games
+other than 4x4 fall back to get_action, one board at a time.
+
+    python game_server.py --unix /tmp/2048.sock --agent Expectimax --depth 2
+    python load_client.py --unix /tmp/2048.sock --sessions 64 --duration 10
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from bitboard import MOVES
+from benchmark import make_agent
+from game_engine import BitboardGame2048
+
+OPS = ("new", "state", "move", "agent_move", "close", "stats")
+
+
+class MicroBatcher:
+    """Collects submitted boards and evaluates them together with evaluate(list of boards) -> list of results."""
+    def __init__(self, evaluate, executor, max_batch=64, max_delay_ms=2.0):
+        self.evaluate = evaluate
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._pending = []  # (board, future)
+        self._timer = None
+        self.batches = 0
+        self.evaluated = 0
+
+    async def submit(self, board):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((board, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.evaluated += len(batch)
+        done = asyncio.get_running_loop().run_in_executor(self.executor, self.evaluate, [b for b, _ in batch])
+        done.add_done_callback(lambda done: self._resolve(batch, done))
+
+    @staticmethod
+    def _resolve(batch, done):
+        error = done.exception()
+        results = [error] * len(batch) if error else done.result()
+        for (_, future), result in zip(batch, results):
+            if future.done():  # the client went away
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+class GameServer:
+    def __init__(self, agent, max_batch=64, max_delay_ms=2.0):
+        self.agent = agent
+        # The agent is not thread-safe, so every evaluation runs on this one thread
+        self.executor = ThreadPoolExecutor(1)
+        self.batcher = MicroBatcher(self._evaluate, self.executor, max_batch, max_delay_ms)
+        self.games = {}
+        self._ids = itertools.count(1)
+        self.requests = collections.Counter()
+
+    def _evaluate(self, boards):
+        """One move per packed 4x4 board, from a single get_batch_actions call."""
+        import numpy as np
+        from batch_engine import move_all
+
+        boards = np.array(boards, dtype=np.uint64)
+        candidates, _ = move_all(boards)
+        valid = candidates != boards[:, None]
+        if getattr(self.agent, "book", None) is not None:
+            actions = self.agent.get_batch_actions(candidates, valid, boards)
+        else:
+            actions = self.agent.get_batch_actions(candidates, valid)
+        return [MOVES[i] for i in actions]
+
+    def _state(self, game_id):
+        game = self.games[game_id]
+        return {"game": game_id, "board": [list(row) for row in game.board], "score": game.score,
+                "over": game.is_game_over()}
+
+    def _game(self, request):
+        game_id = request.get("game")
+        if game_id not in self.games:
+            raise ValueError(f"no game {game_id!r}")
+        return game_id, self.games[game_id]
+
+    async def dispatch(self, request):
+        if not isinstance(request, dict):
+            raise ValueError("requests are JSON objects")
+        op = request.get("op")
+        if op not in OPS:
+            raise ValueError(f"unknown op: {op!r}")
+        self.requests[op] += 1
+        if op == "new":
+            size = int(request.get("size", 4))
+            if size < 2:
+                raise ValueError("size must be at least 2")
+            game_id = next(self._ids)
+            self.games[game_id] = BitboardGame2048(mode="ai", size=size)
+            return self._state(game_id)
+        if op == "stats":
+            return {"games": len(self.games), "requests": dict(self.requests), "batches": self.batcher.batches,
+                    "mean_batch": self.batcher.evaluated / max(1, self.batcher.batches)}
+        game_id, game = self._game(request)
+        if op == "state":
+            return self._state(game_id)
+        if op == "close":
+            del self.games[game_id]
+            return {"closed": game_id}
+        if op == "move":
+            move = request.get("move")
+            if move not in MOVES:
+                raise ValueError(f"unknown move: {move!r}")
+            moved = self._play(game, move)
+            return dict(self._state(game_id), moved=moved)
+        # agent_move
+        if game.is_game_over():
+            raise ValueError(f"game {game_id} is over")
+        if game.size == 4:
+            move = await self.batcher.submit(game.get_state().board)
+        else:
+            loop = asyncio.get_running_loop()
+            move = (await loop.run_in_executor(self.executor, self.agent.get_action, game))[0]
+        if game_id not in self.games:
+            raise ValueError(f"game {game_id} was closed")
+        moved = self._play(game, move)
+        return dict(self._state(game_id), move=move, moved=moved)
+
+    @staticmethod
+    def _play(game, move):
+        before = game.get_state().board
+        game.move_board(move)
+        if game.get_state().board == before:
+            return False
+        game.spawn_tile()
+        return True
+
+    async def handle(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                try:
+                    response = await self.dispatch(json.loads(line))
+                except (ValueError, TypeError) as exc:  # includes malformed JSON
+                    response = {"error": str(exc)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, unix=None, host="127.0.0.1", port=8048):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle, path=unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        where = unix or f"{host}:{port}"
+        print(f"Serving 2048 on {where}", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown()
+            if unix and os.path.exists(unix):
+                os.unlink(unix)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve concurrent 2048 games with batched agent moves.")
+    parser.add_argument("--unix", metavar="PATH", default=None, help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8048)
+    parser.add_argument("--agent", choices=["Random", "Greedy", "Expectimax", "SnakeExpectimax"],
+                        default="Expectimax")
+    parser.add_argument("--depth", type=int, default=2, help="Search depth of the Expectimax agents")
+    parser.add_argument("--book", default=None,
+                        help="Position book the Expectimax agents consult before searching (4x4 games only)")
+    parser.add_argument("--max-batch", type=int, default=64, help="Evaluate once this many agent moves are pending")
+    parser.add_argument("--max-delay-ms", type=float, default=2.0,
+                        help="Longest an agent move waits for its batch to fill")
+    args = parser.parse_args()
+
+    book = None
+    if args.book:
+        from ai_algs.position_book import PositionBook
+        book = PositionBook(args.book)
+    server = GameServer(make_agent(args.agent, depth=args.depth, book=book), args.max_batch, args.max_delay_ms)
+    try:
+        asyncio.run(server.serve(args.unix, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,55 @@
+"""
+Lightweight immutable game states for search.
+
+A GameState is just the packed board (see bitboard.py) and the score, so
+agents can build child states without copying a Game2048 instance.
+"""
+from typing import NamedTuple
+
+import bitboard
+
+
+class GameState(NamedTuple):
+    board: int
+    score: int
+
+
+class StaticGame:
+    """Minimal stand-in for Game2048 that get_action can read a state from."""
+    def __init__(self, state):
+        self.state = state
+
+    def get_state(self):
+        return self.state
+
+
+def apply_move(state, move):
+    """Returns the state after sliding the board in the given direction."""
+    board, gained = bitboard.move(state.board, move)
+    return GameState(board, state.score + gained)
+
+
+def place_tile(state, r, c, value):
+    """Returns the state with a tile of the given value placed at (r, c)."""
+    return GameState(bitboard.set_cell(state.board, r, c, bitboard.tile_to_exponent(value)), state.score)
+
+
+def valid_moves(state):
+    return bitboard.valid_moves(state.board)
+
+
+def is_game_over(state):
+    return bitboard.is_game_over(state.board)
+
+
+def empty_cells(state):
+    return bitboard.empty_cells(state.board)
+
+
+def max_tile(state):
+    return bitboard.exponent_to_tile(bitboard.max_exponent(state.board))
+
+
+def to_rows(state):
+    """Returns the board as a list of lists of tile values."""
+    return bitboard.unpack(state.board)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Load generator for game_server.py.
+
+Each session opens its own connection, starts a game and asks the server for
+agent moves as fast as it answers, starting a new game whenever one ends.
+Reports requests per second and p50/p99 latency per request type, plus the
+server's mean micro-batch size.
+
+    python load_client.py --unix /tmp/2048.sock --sessions 64 --duration 10
+"""
+import argparse
+import asyncio
+import collections
+import json
+import time
+
+from benchmark import percentile
+
+
+class GameClient:
+    """One connection to game_server.py; request() sends a request and returns its response."""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, unix=None, host="127.0.0.1", port=8048):
+        if unix:
+            return cls(*await asyncio.open_unix_connection(unix))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, op, **fields):
+        self.writer.write(json.dumps(dict(fields, op=op)).encode() + b"\n")
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def _session(args, deadline, latencies):
+    client = await GameClient.connect(args.unix, args.host, args.port)
+
+    async def timed(op, **fields):
+        start = time.perf_counter()
+        response = await client.request(op, **fields)
+        latencies[op].append(time.perf_counter() - start)
+        return response
+
+    try:
+        game = (await timed("new", size=args.size))["game"]
+        while time.perf_counter() < deadline:
+            if (await timed("agent_move", game=game))["over"]:
+                await timed("close", game=game)
+                game = (await timed("new", size=args.size))["game"]
+        await client.request("close", game=game)
+    finally:
+        await client.close()
+
+
+async def run(args):
+    latencies = collections.defaultdict(list)
+    start = time.perf_counter()
+    await asyncio.gather(*(_session(args, start + args.duration, latencies) for _ in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+    client = await GameClient.connect(args.unix, args.host, args.port)
+    stats = await client.request("stats")
+    await client.close()
+    return latencies, elapsed, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Drive game_server.py with concurrent sessions.")
+    parser.add_argument("--unix", metavar="PATH", default=None, help="Connect to this Unix socket instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8048)
+    parser.add_argument("--sessions", type=int, default=32, help="Concurrent games, one connection each")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to generate load for")
+    parser.add_argument("--size", type=int, default=4, help="Board size of the games")
+    args = parser.parse_args()
+
+    latencies, elapsed, stats = asyncio.run(run(args))
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.sessions} sessions, {total:,} requests in {elapsed:.1f}s: {total / elapsed:,.0f} requests/s")
+    for op, values in sorted(latencies.items()):
+        ms = [1000 * v for v in values]
+        print(f"  {op:<11} {len(ms):8,d}  {len(ms) / elapsed:8,.0f}/s  "
+              f"p50 {percentile(ms, 50):7.2f} ms  p99 {percentile(ms, 99):7.2f} ms")
+    print(f"  server: {stats['batches']:,} batches, {stats['mean_batch']:.1f} agent moves per batch")
@@ -0,0 +1,184 @@
+"""
+Packed boards of any size N (see bitboard.py for the 4x4 layout they extend).
+
+An NxN board is one int of N*N 4-bit cells holding log2 exponents. Row r
+lives in bits 4N*r to 4N*r + 4N - 1 and column c of that row is the nibble
+at 4*c inside it. Geometry(N) holds the per-row move tables and per-line
+feature terms for one size.
+
+The 4x4 module tabulates all 65,536 rows up front. At N = 5 and 6 that
+would be 16**N rows (about 1M and 17M), so rows are memoized the first time
+they are seen instead; games only ever meet a small fraction of them.
+Transposes and empty-cell scans work on the whole int with masks and
+shifts, so they never miss a table. Nibbles cap tiles at 32768 exactly as
+on 4x4.
+"""
+import functools
+
+from bitboard import MOVES, MAX_EXPONENT, tile_to_exponent, exponent_to_tile
+
+
+class _RowTable(dict):
+    """row -> value, computed by fn on first lookup."""
+    def __init__(self, fn):
+        super().__init__()
+        self.fn = fn
+
+    def __missing__(self, row):
+        value = self[row] = self.fn(row)
+        return value
+
+
+class Geometry:
+    def __init__(self, size):
+        self.size = size
+        self.row_bits = 4 * size
+        self.row_mask = (1 << self.row_bits) - 1
+        self.shifts = [self.row_bits * r for r in range(size)]
+        # A 1 and an 8 in every cell, for finding empty cells without unpacking
+        self._ones = sum(1 << (4 * i) for i in range(size * size))
+        self._highs = self._ones * 8
+        # Move tables: row -> (moved row, score gained)
+        self.left = _RowTable(self._row_left)
+        self.right = _RowTable(self._row_right)
+        # Transposing moves cell (r, c) by 4 * (size - 1) * (c - r) bits: one mask and shift per diagonal
+        self._diagonals = [
+            (sum(1 << (4 * (size * r + r + d)) for r in range(size - d)) * 0xF, 4 * (size - 1) * d)
+            for d in range(1, size)
+        ]
+        self._main_diagonal = sum(0xF << (4 * (size + 1) * r) for r in range(size))
+        # Line features: row -> (empty, merge, monotonicity, log sum, snake ltr, snake rtl, max exponent)
+        self.terms = _RowTable(self._line_terms)
+
+    def cells(self, row):
+        return [(row >> (4 * c)) & 0xF for c in range(self.size)]
+
+    def _reverse(self, row):
+        out = 0
+        for _ in range(self.size):
+            out = (out << 4) | (row & 0xF)
+            row >>= 4
+        return out
+
+    def _row_left(self, row):
+        out = score = shift = pending = 0
+        while row:
+            v = row & 0xF
+            row >>= 4
+            if not v:
+                continue
+            if v == pending and v < MAX_EXPONENT:
+                v += 1
+                score += 1 << v
+                out |= v << shift
+                shift += 4
+                pending = 0
+            else:
+                if pending:
+                    out |= pending << shift
+                    shift += 4
+                pending = v
+        return out | (pending << shift), score
+
+    def _row_right(self, row):
+        moved, score = self.left[self._reverse(row)]
+        return self._reverse(moved), score
+
+    def _line_terms(self, line):
+        cells = self.cells(line)
+        values = [1 << v if v else 0 for v in cells]
+        pairs = list(zip(cells, cells[1:]))
+        n = self.size
+        return (
+            cells.count(0),
+            sum(1 for a, b in pairs if a == b and a),
+            sum(values[i] - values[i + 1] for i in range(n - 1) if values[i] >= values[i + 1]),
+            sum(cells),
+            sum(i * v for i, v in enumerate(cells)),
+            sum((n - 1 - i) * v for i, v in enumerate(cells)),
+            max(cells),
+        )
+
+    def rows(self, board):
+        mask = self.row_mask
+        return [(board >> shift) & mask for shift in self.shifts]
+
+    def transpose(self, board):
+        out = board & self._main_diagonal
+        for above, shift in self._diagonals:
+            # above holds the cells with c - r = d; their mirror images have r - c = d
+            out |= ((board & above) << shift) | ((board >> shift) & above)
+        return out
+
+    def _move_rows(self, board, table):
+        mask = self.row_mask
+        out = 0
+        gained = 0
+        for shift in self.shifts:
+            moved, score = table[(board >> shift) & mask]
+            out |= moved << shift
+            gained += score
+        return out, gained
+
+    def move(self, board, direction):
+        """Returns (new_board, score_gained) after sliding the board in the given direction."""
+        if direction == "Left":
+            return self._move_rows(board, self.left)
+        if direction == "Right":
+            return self._move_rows(board, self.right)
+        if direction == "Up":
+            moved, score = self._move_rows(self.transpose(board), self.left)
+        elif direction == "Down":
+            moved, score = self._move_rows(self.transpose(board), self.right)
+        else:
+            raise ValueError(f"unknown move: {direction!r}")
+        return self.transpose(moved), score
+
+    def valid_moves(self, board):
+        return [m for m in MOVES if self.move(board, m)[0] != board]
+
+    def get_cell(self, board, r, c):
+        return (board >> (self.row_bits * r + 4 * c)) & 0xF
+
+    def set_cell(self, board, r, c, exponent):
+        shift = self.row_bits * r + 4 * c
+        return (board & ~(0xF << shift)) | (exponent << shift)
+
+    def empty_cells(self, board):
+        # Bit 0 of each empty cell, visited lowest first (row-major order)
+        t = board | (board >> 1)
+        empty = ~(t | (t >> 2)) & self._ones
+        cells = []
+        while empty:
+            low = empty & -empty
+            cells.append(divmod((low.bit_length() - 1) >> 2, self.size))
+            empty ^= low
+        return cells
+
+    def has_empty(self, board):
+        # Some cell is 0 exactly when subtracting 1 from every cell borrows out of it
+        return bool((board - self._ones) & ~board & self._highs)
+
+    def max_exponent(self, board):
+        return max(self.terms[row][6] for row in self.rows(board))
+
+    def is_game_over(self, board):
+        if self.has_empty(board):
+            return False
+        return not self.valid_moves(board)
+
+    def pack(self, rows):
+        board = 0
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                board |= tile_to_exponent(value) << (self.row_bits * r + 4 * c)
+        return board
+
+    def unpack(self, board):
+        return [[exponent_to_tile(v) for v in self.cells(row)] for row in self.rows(board)]
+
+
+@functools.lru_cache(maxsize=None)
+def geometry(size):
+    """The shared Geometry of a board size, so its memoized tables fill once per process."""
+    return Geometry(size)
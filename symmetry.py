@@ -0,0 +1,134 @@
+"""
+Dihedral symmetries of packed 4x4 boards (see bitboard.py).
+
+The game itself is symmetric under all 8 rotations and reflections of the
+board, as long as move labels are remapped along with it. A heuristic may only
+be invariant under some of them, so canonicalization takes the group to use:
+
+    FULL      all 8 symmetries
+    DIAGONAL  identity and transpose (rows <-> columns)
+    IDENTITY  no symmetry, the board is its own canonical form
+
+Each symmetry is an index into TRANSFORMS; canonicalize() returns the index
+of the transform that maps a board onto its canonical representative so moves
+can be translated with to_canonical_move/from_canonical_move.
+"""
+from bitboard import transpose
+
+
+def flip_horizontal(board):
+    """Mirrors every row (column c <-> column 3 - c)."""
+    board = ((board & 0x0F0F0F0F0F0F0F0F) << 4) | ((board >> 4) & 0x0F0F0F0F0F0F0F0F)
+    return ((board & 0x00FF00FF00FF00FF) << 8) | ((board >> 8) & 0x00FF00FF00FF00FF)
+
+
+def flip_vertical(board):
+    """Mirrors the board top to bottom (row r <-> row 3 - r)."""
+    return (
+        ((board & 0xFFFF) << 48)
+        | (((board >> 16) & 0xFFFF) << 32)
+        | (((board >> 32) & 0xFFFF) << 16)
+        | (board >> 48)
+    )
+
+
+_HORIZONTAL_MOVES = {"Up": "Up", "Down": "Down", "Left": "Right", "Right": "Left"}
+_VERTICAL_MOVES = {"Up": "Down", "Down": "Up", "Left": "Left", "Right": "Right"}
+_TRANSPOSE_MOVES = {"Up": "Left", "Down": "Right", "Left": "Up", "Right": "Down"}
+
+
+def _make_transform(horizontal, vertical, transposed):
+    def apply(board):
+        if horizontal:
+            board = flip_horizontal(board)
+        if vertical:
+            board = flip_vertical(board)
+        if transposed:
+            board = transpose(board)
+        return board
+
+    moves = {}
+    for move in _TRANSPOSE_MOVES:
+        mapped = move
+        if horizontal:
+            mapped = _HORIZONTAL_MOVES[mapped]
+        if vertical:
+            mapped = _VERTICAL_MOVES[mapped]
+        if transposed:
+            mapped = _TRANSPOSE_MOVES[mapped]
+        moves[move] = mapped
+    return apply, moves
+
+
+# Index 0 is the identity and index 4 the plain transpose
+TRANSFORMS = [
+    _make_transform(horizontal, vertical, transposed)
+    for transposed in (False, True)
+    for vertical in (False, True)
+    for horizontal in (False, True)
+]
+
+FULL = tuple(range(8))
+DIAGONAL = (0, 4)
+IDENTITY = (0,)
+
+
+def apply_transform(board, index):
+    return TRANSFORMS[index][0](board)
+
+
+def canonical_board(board, group=FULL):
+    """Returns the smallest image of the board under the given symmetry group."""
+    if group == IDENTITY:
+        return board
+    if group == DIAGONAL:
+        return min(board, transpose(board))
+    return min(TRANSFORMS[i][0](board) for i in group)
+
+
+def canonicalize(board, group=FULL):
+    """Returns (canonical_board, transform_index) such that apply_transform(board, index) is canonical."""
+    best, best_index = board, 0
+    for i in group:
+        image = TRANSFORMS[i][0](board)
+        if image < best:
+            best, best_index = image, i
+    return best, best_index
+
+
+def _cell_ranks(index):
+    """Maps each (r, c) cell to the row-major index of its image under the transform."""
+    marked = 0
+    for p in range(16):
+        marked |= p << (4 * p)
+    image = TRANSFORMS[index][0](marked)
+    return {divmod((image >> (4 * q)) & 0xF, 4): q for q in range(16)}
+
+
+_CELL_RANKS = [_cell_ranks(i) for i in range(len(TRANSFORMS))]
+
+
+def canonical_cell_order(board, cells, group=FULL):
+    """
+    Sorts row-major (r, c) cells into the row-major order of their images on the
+    canonical board, so symmetric boards list corresponding cells in the same order.
+    """
+    if group == IDENTITY:
+        return cells
+    index = canonicalize(board, group)[1]
+    if index == 0:
+        return cells
+    return sorted(cells, key=_CELL_RANKS[index].__getitem__)
+
+
+def to_canonical_move(move, index):
+    """Maps a move on the original board to the same move on the transformed board."""
+    return TRANSFORMS[index][1][move]
+
+
+def from_canonical_move(move, index):
+    """Maps a move on the transformed board back to the original board."""
+    for original, mapped in TRANSFORMS[index][1].items():
+        if mapped == move:
+            return original
+    raise ValueError(f"unknown move: {move!r}")
@@ -0,0 +1,103 @@
+"""
+Fixed-memory telemetry for per-move feature series.
+
+FeatureTelemetry keeps the last `capacity` values of each feature in a ring
+buffer plus running min, max and mean over the whole run, so memory stays
+constant however long the game. The full series can be streamed to a CSV
+file instead of being held in RAM.
+"""
+import csv
+import math
+from array import array
+
+
+class FeatureTelemetry:
+    def __init__(self, names, capacity=2000, stream_path=None):
+        self.names = tuple(names)
+        self.capacity = capacity
+        self._buffers = [array('d', bytes(8 * capacity)) for _ in self.names]
+        self._head = 0  # slot the next value is written to
+        self.count = 0
+        self.mins = [math.inf] * len(self.names)
+        self.maxs = [-math.inf] * len(self.names)
+        self._sums = [0.0] * len(self.names)
+        self.stream_path = stream_path
+        self._file = None
+        self._writer = None
+        if stream_path is not None:
+            self._file = open(stream_path, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(("move",) + self.names)
+
+    def append(self, values):
+        """Records one move's feature values, in the order of names."""
+        head = self._head
+        for i, value in enumerate(values):
+            self._buffers[i][head] = value
+            if value < self.mins[i]:
+                self.mins[i] = value
+            if value > self.maxs[i]:
+                self.maxs[i] = value
+            self._sums[i] += value
+        if self._writer is not None:
+            self._writer.writerow((self.count,) + tuple(values))
+        self._head = (head + 1) % self.capacity
+        self.count += 1
+
+    def __len__(self):
+        """Values currently buffered per feature."""
+        return min(self.count, self.capacity)
+
+    def mean(self, i):
+        return self._sums[i] / self.count if self.count else 0.0
+
+    def stats(self):
+        """Running {name: (min, max, mean)} over every value appended."""
+        return {name: (self.mins[i], self.maxs[i], self.mean(i)) for i, name in enumerate(self.names)}
+
+    def series(self, i):
+        """(first move index, buffered values oldest first) of feature i."""
+        buf = self._buffers[i]
+        if self.count <= self.capacity:
+            return 0, buf[:self.count]
+        return self.count - self.capacity, buf[self._head:] + buf[:self._head]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+
+def downsample(values, buckets):
+    """
+    Reduces values to at most 2 * buckets (index, value) points by keeping the min
+    and max of each bucket in index order, so spikes survive the reduction.
+    """
+    n = len(values)
+    if n <= 2 * buckets:
+        return list(enumerate(values))
+    points = []
+    for b in range(buckets):
+        lo = b * n // buckets
+        hi = (b + 1) * n // buckets
+        chunk = values[lo:hi]
+        i_min = lo + min(range(len(chunk)), key=chunk.__getitem__)
+        i_max = lo + max(range(len(chunk)), key=chunk.__getitem__)
+        if i_min == i_max:
+            points.append((i_min, values[i_min]))
+        else:
+            points.extend(sorted(((i_min, values[i_min]), (i_max, values[i_max]))))
+    return points
+
+
+def load_stream(path):
+    """Reads a streamed CSV back as {name: list of values}."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        names = next(reader)[1:]
+        columns = [[] for _ in names]
+        for row in reader:
+            for column, value in zip(columns, row[1:]):
+                column.append(float(value))
+    return dict(zip(names, columns))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Trains the n-tuple network behind NTupleAgent by TD(0) self-play.
+
+Each move the network picks the action with the best reward plus afterstate
+value; the previous afterstate's value is then moved towards that target
+(and towards 0 when the game ends). Weights are saved every --save-every
+games, so training can be stopped at any time and continued with --resume.
+
+    python train_ntuple.py --games 20000 --out ntuple_weights.bin
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+import bitboard
+from ai_algs.ntuple import NTupleNetwork, TUPLES
+from ai_algs.NTuple_ai import DEFAULT_WEIGHTS
+
+
+def spawn(board, rng):
+    r, c = rng.choice(bitboard.empty_cells(board))
+    return bitboard.set_cell(board, r, c, 1 if rng.random() < 0.9 else 2)
+
+
+def train_game(network, alpha, rng):
+    """Plays one self-play game, updating the network after every move; returns (score, max tile)."""
+    board = spawn(spawn(0, rng), rng)
+    score = 0
+    prev = None
+    while True:
+        best = network.best_move(board)
+        if best is None:
+            break
+        _, after, reward, target = best
+        if prev is not None:
+            network.update(prev, alpha * (target - network.value(prev)))
+        prev = after
+        score += reward
+        board = spawn(after, rng)
+    if prev is not None:
+        network.update(prev, -alpha * network.value(prev))
+    return score, bitboard.exponent_to_tile(bitboard.max_exponent(board))
+
+
+def save(network, path):
+    tmp = path + ".tmp"
+    network.save(tmp)
+    os.replace(tmp, path)  # processes that mapped the old file keep their pages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the n-tuple network by TD self-play.")
+    parser.add_argument("--games", type=int, default=10000, help="Self-play games to train for")
+    parser.add_argument("--alpha", type=float, default=0.1,
+                        help=f"Learning rate, shared out over the {TUPLES} tuples")
+    parser.add_argument("--out", default=DEFAULT_WEIGHTS, help="Weights file to write")
+    parser.add_argument("--resume", action="store_true", help="Continue training the weights in --out")
+    parser.add_argument("--save-every", type=int, default=500, help="Games between saves")
+    parser.add_argument("--report-every", type=int, default=100, help="Games per progress line")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    network = NTupleNetwork.load(args.out, writable=True) if args.resume else NTupleNetwork()
+    rng = random.Random(args.seed)
+    alpha = args.alpha / TUPLES
+    scores, tiles = [], []
+    start = time.perf_counter()
+    for game in range(1, args.games + 1):
+        score, max_tile = train_game(network, alpha, rng)
+        scores.append(score)
+        tiles.append(max_tile)
+        if game % args.report_every == 0:
+            reached = {tile: sum(t >= tile for t in tiles) / len(tiles) for tile in (512, 1024, 2048)}
+            print(f"games {game:7d}  mean score {statistics.mean(scores):9,.0f}  "
+                  + "  ".join(f"{tile}: {share:5.1%}" for tile, share in reached.items())
+                  + f"  ({game / (time.perf_counter() - start):.1f} games/s)", flush=True)
+            scores, tiles = [], []
+        if game % args.save_every == 0:
+            save(network, args.out)
+    save(network, args.out)
+    print(f"Saved {args.out}")
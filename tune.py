@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tunes the heuristic weights of a search agent by random search with
+successive halving.
+
+Every candidate weight vector plays the same seeded games (common random
+numbers, so differences come from the weights and not the spawns). Round r
+brings each surviving candidate up to games * eta**r games and keeps the best
+1/eta by mean score, so weak candidates are dropped after a few games and most
+compute goes to the promising ones. Games of a round run on a process pool.
+
+Progress is checkpointed to a JSON file after every game; rerunning with the
+same --checkpoint resumes where it stopped (the search settings stored in the
+file win over the command line).
+
+    python tune.py --agent SnakeExpectimax --depth 2 --candidates 32 --games 2 --workers 8
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+
+from benchmark import make_agent, play_one, game_seeds
+from game_engine import BitboardGame2048
+
+
+def sample_weights(defaults, spread, rng):
+    """Scales each default weight by 10**u, u uniform in [-spread, spread]."""
+    return {name: value * 10 ** rng.uniform(-spread, spread) for name, value in defaults.items()}
+
+
+def default_weights(agent_name):
+    agent = make_agent(agent_name, cache_size=0)
+    return {name: getattr(agent, name) for name in agent.weight_names}
+
+
+def _play(job):
+    """Worker: plays one seeded game with the given weights and returns its score."""
+    candidate, game, seed, agent_name, depth, weights = job
+    random.seed(seed)
+    agent = make_agent(agent_name, depth=depth, **weights)
+    score, _ = play_one(agent, BitboardGame2048)
+    return candidate, game, score
+
+
+def new_state(args):
+    rng = random.Random(args.seed)
+    defaults = default_weights(args.agent)
+    # The hand-picked weights always compete, as candidate 0
+    candidates = [defaults] + [sample_weights(defaults, args.spread, rng) for _ in range(args.candidates - 1)]
+    return {
+        'agent': args.agent,
+        'depth': args.depth,
+        'seed': args.seed,
+        'games': args.games,
+        'eta': args.eta,
+        'rounds': args.rounds,
+        'round': 0,
+        'alive': list(range(len(candidates))),
+        'candidates': [{'weights': weights, 'scores': {}} for weights in candidates],
+    }
+
+
+def save_checkpoint(state, path):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)  # never leave a half-written checkpoint
+
+
+def mean_score(candidate, games):
+    return statistics.mean(candidate['scores'][str(k)] for k in range(games))
+
+
+def run(state, checkpoint, workers):
+    eta = state['eta']
+    seeds = game_seeds(state['seed'], state['games'] * eta ** state['rounds'])
+    with multiprocessing.Pool(workers) as pool:
+        while state['round'] <= state['rounds'] and len(state['alive']) > 1:
+            games = state['games'] * eta ** state['round']
+            jobs = [
+                (i, k, seeds[k], state['agent'], state['depth'], state['candidates'][i]['weights'])
+                for i in state['alive']
+                for k in range(games)
+                if str(k) not in state['candidates'][i]['scores']
+            ]
+            print(f"Round {state['round']}: {len(state['alive'])} candidates x {games} games "
+                  f"({len(jobs)} left to play)")
+            for i, k, score in pool.imap_unordered(_play, jobs):
+                state['candidates'][i]['scores'][str(k)] = score
+                save_checkpoint(state, checkpoint)
+
+            ranked = sorted(state['alive'], key=lambda i: -mean_score(state['candidates'][i], games))
+            keep = max(1, math.ceil(len(ranked) / eta))
+            for i in ranked[:min(len(ranked), 5)]:
+                print(f"  #{i:<3} mean {mean_score(state['candidates'][i], games):10,.1f}  "
+                      f"{format_weights(state['candidates'][i]['weights'])}")
+            state['alive'] = ranked[:keep]
+            state['round'] += 1
+            save_checkpoint(state, checkpoint)
+
+
+def best_candidate(state):
+    """The surviving candidate with the best mean over all the games it played."""
+    def mean(i):
+        scores = state['candidates'][i]['scores'].values()
+        return statistics.mean(scores) if scores else -math.inf
+    best = max(state['alive'], key=mean)
+    return best, mean(best)
+
+
+def format_weights(weights):
+    return "  ".join(f"{name}={value:.4g}" for name, value in weights.items())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune search-agent heuristic weights.")
+    parser.add_argument("--agent", choices=["Expectimax", "SnakeExpectimax"], default="Expectimax")
+    parser.add_argument("--depth", type=int, default=2, help="Search depth used while tuning")
+    parser.add_argument("--candidates", type=int, default=16, help="Random weight vectors, including the defaults")
+    parser.add_argument("--games", type=int, default=2, help="Games per candidate in the first round")
+    parser.add_argument("--eta", type=int, default=2, help="Keep 1/eta of the candidates each round")
+    parser.add_argument("--rounds", type=int, default=None,
+                        help="Halving rounds after the first (default: until one candidate is left)")
+    parser.add_argument("--spread", type=float, default=1.0,
+                        help="Sample each weight within 10**-spread..10**spread times its default")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the weights and the games")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--checkpoint", default="tune_checkpoint.json", help="Progress file to write and resume from")
+    args = parser.parse_args()
+    if args.rounds is None:
+        args.rounds = math.ceil(math.log(max(args.candidates, 2), args.eta))
+
+    if os.path.exists(args.checkpoint):
+        with open(args.checkpoint) as f:
+            state = json.load(f)
+        print(f"Resuming {state['agent']} depth {state['depth']} from {args.checkpoint} "
+              f"(round {state['round']}, {len(state['alive'])} candidates alive)")
+    else:
+        state = new_state(args)
+        save_checkpoint(state, args.checkpoint)
+
+    run(state, args.checkpoint, args.workers)
+
+    best, score = best_candidate(state)
+    played = len(state['candidates'][best]['scores'])
+    print(f"\nBest: candidate #{best}, mean score {score:,.1f} over {played} games")
+    print(f"  {format_weights(state['candidates'][best]['weights'])}")
+    if best != 0:
+        print(f"  defaults: {format_weights(state['candidates'][0]['weights'])}")